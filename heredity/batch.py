@@ -0,0 +1,200 @@
+"""
+Run heredity inference over many families in one process pool.
+
+Families are read either from a directory of CSV files (one family per file)
+or from a single CSV stream with an extra `family` column. Every family is
+reduced to its pedigree shape, the parent links between row positions, and
+the inference structure for that shape is compiled once per worker and
+reused for every family sharing it, which then differ only in evidence.
+Results are written as one JSON object per line.
+"""
+
+import argparse
+import csv
+import functools
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+
+from heredity import DEFAULT_MODEL, parse_rows
+from sampling import estimate, likelihood_weighting
+
+# Largest pedigree solved by exact enumeration (3^n gene assignments)
+MAX_EXACT = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run heredity inference over many families."
+    )
+    parser.add_argument("source",
+                        help="directory of CSV files, CSV file with a "
+                             "family column, or - for standard input")
+    parser.add_argument("-o", "--output", default="-",
+                        help="JSONL output file (default: standard output)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--max-exact", type=int, default=MAX_EXACT,
+                        help="largest family solved exactly")
+    parser.add_argument("--error", type=float, default=0.01,
+                        help="error target for sampled families")
+    parser.add_argument("--time", type=float, default=5.0,
+                        help="time limit in seconds for sampled families")
+    args = parser.parse_args()
+
+    families = read_families(args.source)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    solve = functools.partial(
+        solve_family, max_exact=args.max_exact,
+        max_error=args.error, time_limit=args.time
+    )
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            for record in pool.imap(solve, families, chunksize=16):
+                output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def read_families(source):
+    """
+    Yield (family, people) pairs from a directory of CSV files, or from a
+    CSV file or standard input ("-") whose rows carry a `family` column.
+    Rows of one family in a stream need not be contiguous.
+    """
+    if os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            if filename.endswith(".csv"):
+                path = os.path.join(source, filename)
+                with open(path) as f:
+                    people = parse_rows(csv.DictReader(f))
+                yield os.path.splitext(filename)[0], people
+        return
+
+    f = sys.stdin if source == "-" else open(source)
+    try:
+        reader = csv.DictReader(f)
+        if "family" not in (reader.fieldnames or []):
+            raise ValueError(f"{source} has no family column")
+        grouped = dict()
+        for row in reader:
+            grouped.setdefault(row["family"], []).append(row)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    for family, rows in grouped.items():
+        yield family, parse_rows(rows)
+
+
+def shape(people):
+    """
+    Return the pedigree shape of `people`: for each person in row order,
+    the row positions of their mother and father (or None for founders).
+    Families with equal shapes share one compiled model.
+    """
+    position = {person: i for i, person in enumerate(people)}
+    return tuple(
+        (position[people[person]["mother"]], position[people[person]["father"]])
+        if people[person]["mother"] is not None else None
+        for person in people
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def compile_shape(parents, model=DEFAULT_MODEL):
+    """
+    Compile a pedigree shape into every gene assignment together with its
+    prior probability, which does not depend on the observed traits.
+    Cached per process, so each worker compiles a shape only once.
+    """
+    table = model.inheritance
+    n = len(parents)
+    assignments = []
+    priors = []
+    for genes in itertools.product(range(3), repeat=n):
+        p = 1
+        for i in range(n):
+            if parents[i] is None:
+                p *= model.gene[genes[i]]
+            else:
+                mother, father = parents[i]
+                p *= table[genes[mother]][genes[father]][genes[i]]
+        if p > 0:
+            assignments.append(genes)
+            priors.append(p)
+    return assignments, priors
+
+
+def exact_probabilities(people, parents, model=DEFAULT_MODEL):
+    """
+    Return the exact gene and trait marginals of `people` using the
+    compiled model for their shape `parents`.
+    """
+    assignments, priors = compile_shape(parents, model)
+    names = list(people)
+    observed = [(i, people[name]["trait"]) for i, name in enumerate(names)
+                if people[name]["trait"] is not None]
+    likelihood = {
+        t: [model.trait[g][t] for g in range(3)] for t in (True, False)
+    }
+
+    gene_totals = [[0.0, 0.0, 0.0] for _ in names]
+    for genes, p in zip(assignments, priors):
+        for i, t in observed:
+            p *= likelihood[t][genes[i]]
+        for i, g in enumerate(genes):
+            gene_totals[i][g] += p
+
+    probabilities = {}
+    for i, name in enumerate(names):
+        total = sum(gene_totals[i])
+        gene = {g: gene_totals[i][g] / total for g in (2, 1, 0)}
+        trait = people[name]["trait"]
+        if trait is None:
+            p_trait = sum(gene[g] * likelihood[True][g] for g in range(3))
+        else:
+            p_trait = 1.0 if trait else 0.0
+        probabilities[name] = {
+            "gene": gene,
+            "trait": {True: p_trait, False: 1 - p_trait},
+        }
+    return probabilities
+
+
+def solve_family(item, max_exact=MAX_EXACT, max_error=0.01, time_limit=5.0,
+                 model=DEFAULT_MODEL):
+    """
+    Solve one (family, people) pair and return its JSON-ready record.
+    Small families are solved exactly; larger ones by likelihood weighting.
+    """
+    family, people = item
+    record = {"family": family}
+    try:
+        parents = shape(people)
+        if len(people) <= max_exact:
+            record["method"] = "exact"
+            record["probabilities"] = exact_probabilities(
+                people, parents, model
+            )
+        else:
+            sampler = likelihood_weighting(
+                people, rng=random.Random(family), model=model
+            )
+            probabilities, errors, samples = estimate(
+                sampler, max_error=max_error, time_limit=time_limit
+            )
+            record["method"] = "sampling"
+            record["samples"] = samples
+            record["probabilities"] = probabilities
+            record["errors"] = errors
+    except (KeyError, ValueError) as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Benchmark heredity inference engines on synthetic pedigrees.
+
+Pedigrees are generated with a controlled number of people, generations,
+observed traits and loops (children of two relatives), then solved by every
+engine that is practical at that size:
+
+    enumerate   heredity.compute_probabilities, the original enumeration
+    compiled    batch.exact_probabilities, enumeration over genes only
+    lw          likelihood weighting from sampling.py
+    gibbs       Gibbs sampling from sampling.py
+
+Every engine's marginals are compared with an exact reference, and the
+timings are printed as a table and a log-scale chart of time against size,
+which shows where one engine should hand over to the next.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import statistics
+import time
+
+import batch
+from heredity import DEFAULT_MODEL, compute_probabilities
+from sampling import estimate, gibbs, likelihood_weighting
+
+# Largest pedigree each exact engine is run on (6^n and 3^n assignments)
+MAX_SIZE = {
+    "enumerate": 7,
+    "compiled": 11,
+}
+
+ENGINES = ["enumerate", "compiled", "lw", "gibbs"]
+
+# Width in characters of the longest bar in the chart
+CHART_WIDTH = 50
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark heredity inference on synthetic pedigrees."
+    )
+    parser.add_argument("--sizes", default="3,4,5,6,7,8,10,12,16,24",
+                        help="comma-separated pedigree sizes")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="number of generations")
+    parser.add_argument("--evidence", type=float, default=0.5,
+                        help="fraction of people with an observed trait")
+    parser.add_argument("--loops", type=int, default=0,
+                        help="children born to two relatives")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="pedigrees generated per size")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help="comma-separated engines to run")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="largest allowed marginal difference")
+    parser.add_argument("--sample-time", type=float, default=2.0,
+                        help="time limit in seconds for the samplers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    engines = args.engines.split(",")
+    for engine in engines:
+        if engine not in ENGINES:
+            parser.error(f"unknown engine {engine}")
+
+    rng = random.Random(args.seed)
+    results = []
+    for size in sizes:
+        for repeat in range(args.repeats):
+            people = generate_pedigree(
+                size, depth=args.depth, evidence=args.evidence,
+                loops=args.loops, rng=rng
+            )
+            results.extend(run_engines(
+                people, engines, tolerance=args.tolerance,
+                sample_time=args.sample_time, seed=rng.randrange(2 ** 32)
+            ))
+
+    print_table(results, sizes, engines)
+    print()
+    print_chart(results, sizes, engines)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = [r for r in results if r["agrees"] is False]
+    if failures:
+        raise SystemExit(f"{len(failures)} runs disagreed with the reference")
+
+
+def generate_pedigree(size, depth=3, evidence=0.5, loops=0, rng=random,
+                      model=DEFAULT_MODEL):
+    """
+    Return a random pedigree of `size` people over `depth` generations, in
+    the same format as `heredity.load_data`.
+
+    The first generation is a founding couple, and the second their
+    children. Every later child has one parent from the previous generation
+    and a spouse who marries in as a new founder, except for up to `loops`
+    children whose parents are two relatives from the previous generation,
+    which closes a loop in the pedigree. When there is no room left for
+    another founder, a child's parents are both taken from existing people.
+    Genes and traits are sampled from `model`, and each trait is then
+    observed with probability `evidence`.
+    """
+    if size < 2:
+        raise ValueError("a pedigree needs at least two people")
+
+    parents = {"P0": None, "P1": None}
+    ancestors = {"P0": frozenset(), "P1": frozenset()}
+    generation = ["P0", "P1"]
+    loops_left = loops
+    for g in range(1, depth):
+        if len(parents) >= size:
+            break
+        remaining_generations = depth - g
+        budget = math.ceil((size - len(parents)) / remaining_generations)
+        children = []
+        relatives = [
+            (a, b) for a, b in itertools.combinations(generation, 2)
+            if ancestors[a] & ancestors[b]
+        ]
+        while budget > 0 and len(parents) < size:
+            if g == 1:
+                mother, father = "P0", "P1"
+            elif loops_left and relatives:
+                mother, father = rng.choice(relatives)
+                loops_left -= 1
+            elif len(parents) + 2 <= size:
+                mother = rng.choice(generation)
+                father = f"P{len(parents)}"
+                parents[father] = None
+                ancestors[father] = frozenset()
+                budget -= 1
+            else:
+                mother, father = _couple(generation, parents, rng)
+            child = f"P{len(parents)}"
+            parents[child] = (mother, father)
+            ancestors[child] = (
+                ancestors[mother] | ancestors[father] | {mother, father}
+            )
+            children.append(child)
+            budget -= 1
+        generation = children or generation
+
+    # Fill up any remaining people as children of the last generation
+    while len(parents) < size:
+        child = f"P{len(parents)}"
+        parents[child] = _couple(generation, parents, rng)
+
+    # Sample genes and traits forward, then hide some of the traits
+    genes = {}
+    people = {}
+    for person, couple in parents.items():
+        if couple is None:
+            weights = [model.gene[g] for g in range(3)]
+            mother = father = None
+        else:
+            mother, father = couple
+            weights = model.inheritance[genes[mother]][genes[father]]
+        genes[person] = rng.choices(range(3), weights)[0]
+        trait = rng.random() < model.trait[genes[person]][True]
+        people[person] = {
+            "name": person,
+            "mother": mother,
+            "father": father,
+            "trait": trait if rng.random() < evidence else None,
+        }
+    return people
+
+
+def _couple(generation, parents, rng):
+    """
+    Pick two existing people to parent a child, preferring `generation`.
+    """
+    if len(generation) >= 2:
+        return tuple(rng.sample(generation, 2))
+    other = rng.choice([p for p in parents if p != generation[0]])
+    return generation[0], other
+
+
+def run_engines(people, engines, tolerance=0.02, sample_time=2.0, seed=0):
+    """
+    Solve `people` with each engine in `engines` that is practical at this
+    size, and return one result dictionary per engine run.
+    """
+    size = len(people)
+    parents = batch.shape(people)
+    solvers = {
+        "enumerate": lambda: compute_probabilities(people),
+        "compiled": lambda: batch.exact_probabilities(people, parents),
+        "lw": lambda: estimate(
+            likelihood_weighting(people, rng=random.Random(seed)),
+            max_error=tolerance / 2, time_limit=sample_time
+        )[0],
+        "gibbs": lambda: estimate(
+            gibbs(people, rng=random.Random(seed)),
+            max_error=tolerance / 2, time_limit=sample_time
+        )[0],
+    }
+
+    runs = []
+    reference = None
+    for engine in engines:
+        if size > MAX_SIZE.get(engine, math.inf):
+            continue
+        batch.compile_shape.cache_clear()
+        start = time.perf_counter()
+        probabilities = solvers[engine]()
+        elapsed = time.perf_counter() - start
+        if reference is None and engine in MAX_SIZE:
+            reference = (engine, probabilities)
+        runs.append({
+            "size": size,
+            "engine": engine,
+            "seconds": elapsed,
+            "probabilities": probabilities,
+        })
+
+    # Compare every run against the first exact engine that ran
+    for run in runs:
+        probabilities = run.pop("probabilities")
+        if reference is None:
+            run["reference"] = None
+            run["difference"] = None
+            run["agrees"] = None
+        else:
+            run["reference"] = reference[0]
+            run["difference"] = max_difference(probabilities, reference[1])
+            run["agrees"] = run["difference"] <= tolerance
+    return runs
+
+
+def max_difference(a, b):
+    """
+    Return the largest absolute difference between two sets of marginals.
+    """
+    return max(
+        abs(a[person][field][value] - b[person][field][value])
+        for person in b
+        for field in b[person]
+        for value in b[person][field]
+    )
+
+
+def print_table(results, sizes, engines):
+    """
+    Print median time and worst marginal difference per size and engine.
+    """
+    print(f"{'size':>5}" + "".join(f"{engine:>22}" for engine in engines))
+    for size in sizes:
+        line = f"{size:>5}"
+        for engine in engines:
+            runs = [r for r in results
+                    if r["size"] == size and r["engine"] == engine]
+            if not runs:
+                line += f"{'-':>22}"
+                continue
+            seconds = statistics.median(r["seconds"] for r in runs)
+            differences = [r["difference"] for r in runs
+                           if r["difference"] is not None]
+            if differences:
+                cell = f"{seconds:.4f}s ±{max(differences):.3f}"
+            else:
+                cell = f"{seconds:.4f}s"
+            line += f"{cell:>22}"
+        print(line)
+
+
+def print_chart(results, sizes, engines):
+    """
+    Print a log-scale bar chart of median time against pedigree size.
+    """
+    medians = {}
+    for size in sizes:
+        for engine in engines:
+            runs = [r["seconds"] for r in results
+                    if r["size"] == size and r["engine"] == engine]
+            if runs:
+                medians[(size, engine)] = max(statistics.median(runs), 1e-6)
+    if not medians:
+        return
+
+    low = math.log10(min(medians.values()))
+    high = math.log10(max(medians.values()))
+    span = max(high - low, 1e-9)
+    print(f"Median time, log scale from {10 ** low:.2g}s "
+          f"to {10 ** high:.2g}s")
+    for size in sizes:
+        for engine in engines:
+            if (size, engine) not in medians:
+                continue
+            seconds = medians[(size, engine)]
+            length = 1 + round((math.log10(seconds) - low) / span
+                               * (CHART_WIDTH - 1))
+            print(f"{size:>5} {engine:<10} {'#' * length} {seconds:.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,53 @@ PROBS = {
 }
 
 
+class Model:
+    """
+    Parameters of the heredity model.
+
+    Takes gene priors, trait probabilities given gene count and a mutation
+    rate in the same layout as `PROBS`, falling back to `PROBS` for any that
+    are not given. The child-given-parents inheritance table is computed once
+    here, so inference never has to redo the per-parent transmission
+    arithmetic.
+    """
+
+    def __init__(self, gene=None, trait=None, mutation=None):
+        self.gene = dict(PROBS["gene"] if gene is None else gene)
+        self.trait = {
+            g: dict(t)
+            for g, t in (PROBS["trait"] if trait is None else trait).items()
+        }
+        self.mutation = PROBS["mutation"] if mutation is None else mutation
+
+        # Probability of passing one copy on, by the parent's gene count
+        self.passing = (self.mutation, 0.5, 1 - self.mutation)
+
+        # inheritance[m][f][c]: probability that a child has `c` copies
+        # given a mother with `m` copies and a father with `f` copies
+        self.inheritance = tuple(
+            tuple(
+                (
+                    (1 - pm) * (1 - pf),
+                    pm * (1 - pf) + (1 - pm) * pf,
+                    pm * pf,
+                )
+                for pf in self.passing
+            )
+            for pm in self.passing
+        )
+
+    @classmethod
+    def from_probs(cls, probs):
+        """
+        Build a model from a dictionary laid out like `PROBS`.
+        """
+        return cls(probs["gene"], probs["trait"], probs["mutation"])
+
+
+DEFAULT_MODEL = Model()
+
+
 def main():
 
     # Check for proper usage
@@ -25,6 +72,24 @@ def main():
         sys.exit("Usage: python heredity.py data.csv")
     people = load_data(sys.argv[1])
 
+    probabilities = compute_probabilities(people)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def compute_probabilities(people, model=None):
+    """
+    Return the exact gene and trait distribution of every person in
+    `people`, by enumerating every possible assignment of genes and traits.
+    """
+
     # Keep track of gene and trait probabilities for each person
     probabilities = {
         person: {"gene": {2: 0, 1: 0, 0: 0}, "trait": {True: 0, False: 0}}
@@ -51,20 +116,14 @@ def main():
             for two_genes in powerset(names - one_gene):
 
                 # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
+                p = joint_probability(
+                    people, one_gene, two_genes, have_trait, model
+                )
                 update(probabilities, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
-
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    return probabilities
 
 
 def load_data(filename):
@@ -74,21 +133,28 @@ def load_data(filename):
     mother, father must both be blank, or both be valid names in the CSV.
     trait should be 0 or 1 if trait is known, blank otherwise.
     """
-    data = dict()
     with open(filename) as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            name = row["name"]
-            data[name] = {
-                "name": name,
-                "mother": row["mother"] or None,
-                "father": row["father"] or None,
-                "trait": (
-                    True
-                    if row["trait"] == "1"
-                    else False if row["trait"] == "0" else None
-                ),
-            }
+        return parse_rows(csv.DictReader(f))
+
+
+def parse_rows(rows):
+    """
+    Build the same dictionary as `load_data` from an iterable of CSV rows,
+    each a dict with keys name, mother, father and trait.
+    """
+    data = dict()
+    for row in rows:
+        name = row["name"]
+        data[name] = {
+            "name": name,
+            "mother": row["mother"] or None,
+            "father": row["father"] or None,
+            "trait": (
+                True
+                if row["trait"] == "1"
+                else False if row["trait"] == "0" else None
+            ),
+        }
     return data
 
 
@@ -105,7 +171,7 @@ def powerset(s):
     ]
 
 
-def joint_probability(people, one_gene, two_genes, have_trait):
+def joint_probability(people, one_gene, two_genes, have_trait, model=None):
     """
     Compute and return a joint probability.
 
@@ -115,54 +181,35 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone not in `one_gene` or `two_gene` does not have the gene, and
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
+
+    Parameters come from `model`, or from `PROBS` when no model is given.
     """
+    if model is None:
+        model = DEFAULT_MODEL
+
+    # Determine number of genes for everyone first, so that children can
+    # look their parents up in the precomputed inheritance table.
+    genes = {
+        person: 1 if person in one_gene else 2 if person in two_genes else 0
+        for person in people
+    }
 
     probability = 1
 
     for person in people:
         mother = people[person]["mother"]
         father = people[person]["father"]
-
-        # Determine number of genes.
-        if person in one_gene:
-            genes = 1
-        elif person in two_genes:
-            genes = 2
-        else:
-            genes = 0
+        gene = genes[person]
 
         # Compute gene probability.
-
-        # Case 1 - no parents info.
         if mother is None and father is None:
-            p_gene = PROBS["gene"][genes]
+            p_gene = model.gene[gene]
         else:
-            # Calculate the probability of inheriting the gene from each parent.
-
-            # Helper function.
-            def pass_gene(parent):
-                if parent in two_genes:
-                    return 1 - PROBS["mutation"]
-                elif parent in one_gene:
-                    return 0.5
-                else:
-                    return PROBS["mutation"]
-
-            mother_prob = pass_gene(mother)
-            father_prob = pass_gene(father)
-
-            if genes == 2:
-                p_gene = mother_prob * father_prob
-            elif genes == 1:
-                p_gene = (
-                    mother_prob * (1 - father_prob) + (1 - mother_prob) * father_prob
-                )
-            else:
-                p_gene = (1 - mother_prob) * (1 - father_prob)
+            p_gene = model.inheritance[genes[mother]][genes[father]][gene]
 
         # Compute trait probability.
         has_trait = person in have_trait
-        p_trait = PROBS["trait"][genes][has_trait]
+        p_trait = model.trait[gene][has_trait]
         probability = probability * (p_gene * p_trait)
 
     return probability
@@ -0,0 +1,456 @@
+"""
+Approximate inference for heredity by Monte Carlo sampling.
+
+Exact enumeration in heredity.py grows as 2^n * 3^n in the number of people,
+so larger pedigrees are handled here instead by likelihood weighting or Gibbs
+sampling over the same CPTs (a heredity `Model`, `PROBS` by default). Both
+samplers work on a whole batch of samples at once (column by column, one
+person at a time) and yield running estimates together with 95% confidence
+half-widths, so a caller can stop as soon as the estimates are good enough or
+a time budget runs out.
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+
+from heredity import DEFAULT_MODEL, load_data
+
+# Two-sided 95% normal quantile used for the confidence half-widths
+Z = 1.96
+
+# Log-weight assigned to evidence that a model makes impossible
+LOG_ZERO = -math.inf
+
+# Without a time limit, estimate gives up after this many estimates in a row
+# without a finite half-width, as when no sample has fit the evidence yet
+MAX_IMPOSSIBLE_BATCHES = 100
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Approximate heredity marginals by sampling."
+    )
+    parser.add_argument("data", help="CSV file with name,mother,father,trait")
+    parser.add_argument("--method", choices=["lw", "gibbs"], default="lw",
+                        help="likelihood weighting (lw) or Gibbs sampling")
+    parser.add_argument("--error", type=float, default=0.01,
+                        help="stop once every 95%% half-width is below this")
+    parser.add_argument("--time", type=float, default=None,
+                        help="wall-clock limit in seconds")
+    parser.add_argument("--batch", type=int, default=1000,
+                        help="samples (lw) or chains (gibbs) per batch")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    people = load_data(args.data)
+    rng = random.Random(args.seed)
+    if args.method == "lw":
+        sampler = likelihood_weighting(people, batch_size=args.batch, rng=rng)
+    else:
+        sampler = gibbs(people, chains=args.batch, rng=rng)
+    try:
+        probabilities, errors, samples = estimate(
+            sampler, max_error=args.error, time_limit=args.time
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    if math.isinf(worst_error(errors)):
+        sys.exit(f"no sample fit the evidence in {samples} samples")
+
+    # Print results in the same layout as heredity.py, plus half-widths
+    print(f"Samples: {samples}")
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                e = errors[person][field][value]
+                print(f"    {value}: {p:.4f} ± {e:.4f}")
+
+
+def estimate(sampler, max_error=0.01, time_limit=None, min_samples=2000):
+    """
+    Consume running estimates from `sampler` until every confidence
+    half-width is at most `max_error`, or until `time_limit` seconds of
+    wall-clock time have passed, whichever comes first.
+    Returns the last (probabilities, errors, samples) triple produced.
+
+    Estimates with an infinite half-width carry no information yet. Without
+    a time limit, MAX_IMPOSSIBLE_BATCHES of them in a row raise ValueError,
+    since the evidence is then impossible or too unlikely to sample.
+    """
+    if max_error is None and time_limit is None:
+        raise ValueError("need an error target or a time limit to stop")
+
+    start = time.perf_counter()
+    last = None
+    uninformed = 0
+    for last in sampler:
+        probabilities, errors, samples = last
+        if time_limit is not None and time.perf_counter() - start >= time_limit:
+            break
+        error = worst_error(errors)
+        if math.isinf(error):
+            uninformed += 1
+            if time_limit is None and uninformed >= MAX_IMPOSSIBLE_BATCHES:
+                raise ValueError(
+                    f"no sample fits the evidence in {samples} samples; "
+                    "it is impossible or too unlikely for sampling"
+                )
+        else:
+            uninformed = 0
+        if (max_error is not None and samples >= min_samples
+                and error <= max_error):
+            break
+    return last
+
+
+def worst_error(errors):
+    """
+    Return the largest half-width over every person and field in `errors`.
+    """
+    return max(
+        (error for person in errors.values()
+         for field in person.values() for error in field.values()),
+        default=0.0
+    )
+
+
+def topological_order(people):
+    """
+    Return the names in `people` ordered so that parents come before children.
+    """
+    order = []
+    placed = set()
+    remaining = list(people)
+    while remaining:
+        deferred = []
+        for person in remaining:
+            mother = people[person]["mother"]
+            father = people[person]["father"]
+            if mother is None or (mother in placed and father in placed):
+                order.append(person)
+                placed.add(person)
+            else:
+                deferred.append(person)
+        if len(deferred) == len(remaining):
+            raise ValueError("pedigree contains a cycle or an unknown parent")
+        remaining = deferred
+    return order
+
+
+def likelihood_weighting(people, batch_size=1000, rng=random, model=None):
+    """
+    Yield running (probabilities, errors, samples) estimates for `people`
+    using likelihood weighting.
+
+    Genes are sampled forward in parent -> child order and each sample is
+    weighted by the likelihood of the observed traits. Unobserved traits are
+    never sampled: their marginal is averaged as P(trait | gene) instead,
+    which has lower variance. Errors are 95% half-widths of the ratio
+    estimator, using the delta-method variance.
+    """
+    if model is None:
+        model = DEFAULT_MODEL
+    order = topological_order(people)
+    gene_prior = [model.gene[g] for g in range(3)]
+    passing = model.passing
+    trait_true = [model.trait[g][True] for g in range(3)]
+    log_trait = {
+        observed: [math.log(model.trait[g][observed])
+                   if model.trait[g][observed] > 0 else LOG_ZERO
+                   for g in range(3)]
+        for observed in (True, False)
+    }
+
+    # Each marginal is a ratio sum(w x) / sum(w); keep sum(w x), sum(w^2 x)
+    # and sum(w^2 x^2) per marginal, all scaled by exp(-scale) so that the
+    # weights of large pedigrees cannot underflow.
+    keys = [(person, "gene", g) for person in order for g in (2, 1, 0)]
+    keys += [(person, "trait", t) for person in order for t in (True, False)]
+    sums = {key: [0.0, 0.0, 0.0] for key in keys}
+    total_w = 0.0
+    total_w2 = 0.0
+    scale = None
+    samples = 0
+
+    while True:
+        log_w = [0.0] * batch_size
+        genes = {}
+
+        # Sample every person across the whole batch, parents first
+        for person in order:
+            mother = people[person]["mother"]
+            father = people[person]["father"]
+            if mother is None:
+                p0, p1 = gene_prior[0], gene_prior[0] + gene_prior[1]
+                column = []
+                for _ in range(batch_size):
+                    r = rng.random()
+                    column.append(0 if r < p0 else 1 if r < p1 else 2)
+            else:
+                mothers, fathers = genes[mother], genes[father]
+                column = [
+                    (rng.random() < passing[m]) + (rng.random() < passing[f])
+                    for m, f in zip(mothers, fathers)
+                ]
+            genes[person] = column
+
+            observed = people[person]["trait"]
+            if observed is not None:
+                likelihood = log_trait[observed]
+                log_w = [lw + likelihood[g] for lw, g in zip(log_w, column)]
+
+        # Rescale the running sums to this batch's largest log-weight
+        batch_max = max(log_w)
+        if batch_max == LOG_ZERO:
+            # No sample in the batch fits the evidence, so the estimates
+            # stand (or, before any sample has fit it, are still unknown),
+            # but yield anyway to let the caller check its clock
+            samples += batch_size
+            if scale is None:
+                yield _no_estimates(order) + (samples,)
+            else:
+                yield _ratio_estimates(
+                    people, order, sums, total_w, total_w2
+                ) + (samples,)
+            continue
+        if scale is None or batch_max > scale:
+            if scale is not None:
+                shrink = math.exp(scale - batch_max)
+                total_w *= shrink
+                total_w2 *= shrink * shrink
+                for acc in sums.values():
+                    acc[0] *= shrink
+                    acc[1] *= shrink * shrink
+                    acc[2] *= shrink * shrink
+            scale = batch_max
+        weights = [math.exp(lw - scale) for lw in log_w]
+        total_w += sum(weights)
+        total_w2 += sum(w * w for w in weights)
+        samples += batch_size
+
+        # Accumulate weighted indicators and trait expectations
+        for person in order:
+            column = genes[person]
+            observed = people[person]["trait"]
+            gene_sums = [[0.0, 0.0], [0.0, 0.0], [0.0, 0.0]]
+            trait_sums = [0.0, 0.0, 0.0]
+            for w, g in zip(weights, column):
+                acc = gene_sums[g]
+                acc[0] += w
+                acc[1] += w * w
+                if observed is None:
+                    x = trait_true[g]
+                    trait_sums[0] += w * x
+                    trait_sums[1] += w * w * x
+                    trait_sums[2] += w * w * x * x
+            for g in range(3):
+                acc = sums[(person, "gene", g)]
+                acc[0] += gene_sums[g][0]
+                acc[1] += gene_sums[g][1]
+                acc[2] += gene_sums[g][1]
+            if observed is None:
+                acc = sums[(person, "trait", True)]
+                for i in range(3):
+                    acc[i] += trait_sums[i]
+
+        yield _ratio_estimates(people, order, sums, total_w, total_w2) + (
+            samples,
+        )
+
+
+def _no_estimates(order):
+    """
+    Return (probabilities, errors) for when no sample has any weight:
+    unknown (NaN) marginals with infinite half-widths.
+    """
+    probabilities = {}
+    errors = {}
+    for person in order:
+        probabilities[person] = {
+            "gene": {g: math.nan for g in (2, 1, 0)},
+            "trait": {True: math.nan, False: math.nan},
+        }
+        errors[person] = {
+            "gene": {g: math.inf for g in (2, 1, 0)},
+            "trait": {True: math.inf, False: math.inf},
+        }
+    return probabilities, errors
+
+
+def _ratio_estimates(people, order, sums, total_w, total_w2):
+    """
+    Turn weighted sums into (probabilities, errors) for likelihood weighting.
+    """
+    probabilities = {}
+    errors = {}
+    for person in order:
+        probabilities[person] = {"gene": {}, "trait": {}}
+        errors[person] = {"gene": {}, "trait": {}}
+        for g in (2, 1, 0):
+            sw, sw2, sw2x2 = sums[(person, "gene", g)]
+            p, e = _ratio(sw, sw2, sw2x2, total_w, total_w2)
+            probabilities[person]["gene"][g] = p
+            errors[person]["gene"][g] = e
+
+        observed = people[person]["trait"]
+        if observed is None:
+            sw, sw2, sw2x2 = sums[(person, "trait", True)]
+            p, e = _ratio(sw, sw2, sw2x2, total_w, total_w2)
+        else:
+            p, e = (1.0 if observed else 0.0), 0.0
+        probabilities[person]["trait"][True] = p
+        probabilities[person]["trait"][False] = 1 - p
+        errors[person]["trait"][True] = e
+        errors[person]["trait"][False] = e
+    return probabilities, errors
+
+
+def _ratio(swx, sw2x, sw2x2, sw, sw2):
+    """
+    Return the ratio estimate swx / sw and its 95% half-width.
+    """
+    p = swx / sw
+    variance = (sw2x2 - 2 * p * sw2x + p * p * sw2) / (sw * sw)
+    return p, Z * math.sqrt(max(variance, 0.0))
+
+
+def gibbs(people, chains=100, burn_in=50, sweeps_per_yield=10, rng=random,
+          model=None):
+    """
+    Yield running (probabilities, errors, samples) estimates for `people`
+    using Gibbs sampling.
+
+    Runs `chains` independent chains side by side. Each sweep resamples
+    every person's gene count from its full conditional: the prior (or the
+    inheritance table given the parents), the likelihood of an observed
+    trait, and the inheritance probability of each child. Errors are 95%
+    half-widths from the spread of the per-chain means, which stays honest
+    despite the autocorrelation within each chain.
+    """
+    if chains < 2:
+        raise ValueError("need at least two chains to estimate the error")
+
+    if model is None:
+        model = DEFAULT_MODEL
+    order = topological_order(people)
+    table = model.inheritance
+    gene_prior = [model.gene[g] for g in range(3)]
+    trait_true = [model.trait[g][True] for g in range(3)]
+
+    # For each person, the children they have and who the other parent is
+    children = {person: [] for person in people}
+    for person in order:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if mother is not None:
+            children[mother].append((person, father))
+            children[father].append((person, mother))
+
+    # Start every chain from a forward sample of the prior
+    genes = {}
+    for person in order:
+        mother = people[person]["mother"]
+        father = people[person]["father"]
+        if mother is None:
+            genes[person] = [_categorical(gene_prior, rng)
+                             for _ in range(chains)]
+        else:
+            genes[person] = [
+                _categorical(table[m][f], rng)
+                for m, f in zip(genes[mother], genes[father])
+            ]
+
+    def sweep():
+        for person in order:
+            mother = people[person]["mother"]
+            father = people[person]["father"]
+            observed = people[person]["trait"]
+            column = genes[person]
+            for k in range(chains):
+                if mother is None:
+                    weights = list(gene_prior)
+                else:
+                    weights = list(table[genes[mother][k]][genes[father][k]])
+                for g in range(3):
+                    if observed is not None:
+                        weights[g] *= model.trait[g][observed]
+                    for child, other in children[person]:
+                        weights[g] *= table[g][genes[other][k]][
+                            genes[child][k]
+                        ]
+                column[k] = _categorical(weights, rng)
+
+    for _ in range(burn_in):
+        sweep()
+
+    # Per-chain sums of gene indicators and of P(trait | gene)
+    gene_sums = {person: [[0] * chains for _ in range(3)] for person in order}
+    trait_sums = {person: [0.0] * chains for person in order}
+    sweeps = 0
+
+    while True:
+        for _ in range(sweeps_per_yield):
+            sweep()
+            sweeps += 1
+            for person in order:
+                column = genes[person]
+                per_gene = gene_sums[person]
+                traits = trait_sums[person]
+                for k in range(chains):
+                    g = column[k]
+                    per_gene[g][k] += 1
+                    traits[k] += trait_true[g]
+
+        probabilities = {}
+        errors = {}
+        for person in order:
+            probabilities[person] = {"gene": {}, "trait": {}}
+            errors[person] = {"gene": {}, "trait": {}}
+            for g in (2, 1, 0):
+                p, e = _chain_mean(gene_sums[person][g], sweeps)
+                probabilities[person]["gene"][g] = p
+                errors[person]["gene"][g] = e
+            observed = people[person]["trait"]
+            if observed is None:
+                p, e = _chain_mean(trait_sums[person], sweeps)
+            else:
+                p, e = (1.0 if observed else 0.0), 0.0
+            probabilities[person]["trait"][True] = p
+            probabilities[person]["trait"][False] = 1 - p
+            errors[person]["trait"][True] = e
+            errors[person]["trait"][False] = e
+
+        yield probabilities, errors, sweeps * chains
+
+
+def _chain_mean(sums, sweeps):
+    """
+    Return the mean over chains of `sums` / `sweeps` and its 95% half-width.
+    """
+    means = [s / sweeps for s in sums]
+    n = len(means)
+    mean = sum(means) / n
+    variance = sum((m - mean) ** 2 for m in means) / (n - 1)
+    return mean, Z * math.sqrt(variance / n)
+
+
+def _categorical(weights, rng):
+    """
+    Sample an index with probability proportional to `weights`.
+    """
+    r = rng.random() * sum(weights)
+    for i, w in enumerate(weights):
+        r -= w
+        if r < 0:
+            return i
+    return len(weights) - 1
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark the logic engines on generated knights-and-knaves puzzles.
+
+For each puzzle size, every engine answers whether the knowledge entails each
+knight and knave symbol. Engines are skipped once the number of symbols makes
+them impractical. All engines that ran must give the same answers, and those
+answers must agree with the hidden solution of the puzzle. Results are printed
+as a table and can be written as JSON to compare runs over time.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+from compiled import compiled_check
+from generator import generate_puzzle
+from logic import model_check, model_check_all
+from sat import KnowledgeBase, sat_check
+from truthtable import TruthTable
+
+# Largest number of symbols each engine is run on (None means no limit)
+ENGINES = {
+    "model_check": 14,
+    "model_check_all": 14,
+    "compiled": 16,
+    "truth_table": 24,
+    "sat": None,
+    "incremental": None,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark logic engines on knights-and-knaves puzzles."
+    )
+    parser.add_argument("--inhabitants", default="2,3,4,5,6,7,9,12,25,50",
+                        help="comma-separated puzzle sizes")
+    parser.add_argument("--statements", type=float, default=1.0,
+                        help="statements per inhabitant")
+    parser.add_argument("--depth", type=int, default=2,
+                        help="nesting depth of each statement")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="puzzles generated per size")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help="comma-separated engines to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.inhabitants.split(",")]
+    engines = args.engines.split(",")
+    for engine in engines:
+        if engine not in ENGINES:
+            parser.error(f"unknown engine {engine}")
+
+    rng = random.Random(args.seed)
+    results = []
+    for size in sizes:
+        for repeat in range(args.repeats):
+            knowledge, symbols, solution = generate_puzzle(
+                size, statements=round(size * args.statements),
+                depth=args.depth, rng=rng
+            )
+            results.extend(run_engines(knowledge, symbols, solution, engines))
+
+    print_table(results, sizes, engines)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = [r for r in results if not r["correct"]]
+    if failures:
+        for r in failures:
+            print(f"{r['engine']} gave wrong answers on a puzzle with "
+                  f"{r['inhabitants']} inhabitants", file=sys.stderr)
+        sys.exit(1)
+
+
+def run_engines(knowledge, symbols, solution, engines):
+    """
+    Answer every symbol of one puzzle with each practical engine, and return
+    one result dictionary per engine.
+    """
+    count = len(knowledge.symbols())
+
+    def each(check):
+        return lambda: {s: check(knowledge, s) for s in symbols}
+
+    def truth_table():
+        table = TruthTable(sorted(knowledge.symbols()))
+        return {s: table.entails(knowledge, s) for s in symbols}
+
+    def incremental():
+        return KnowledgeBase(knowledge).entails_all(symbols)
+
+    solvers = {
+        "model_check": each(model_check),
+        "model_check_all": lambda: model_check_all(knowledge, symbols),
+        "compiled": each(compiled_check),
+        "truth_table": truth_table,
+        "sat": each(sat_check),
+        "incremental": incremental,
+    }
+
+    results = []
+    reference = None
+    for engine in engines:
+        limit = ENGINES[engine]
+        if limit is not None and count > limit:
+            continue
+        start = time.perf_counter()
+        answers = solvers[engine]()
+        elapsed = time.perf_counter() - start
+
+        # Anything entailed must hold in the hidden solution, and every
+        # engine must agree with the first one that ran
+        if reference is None:
+            reference = answers
+        correct = answers == reference and all(
+            solution[s.name] for s in symbols if answers[s]
+        )
+        results.append({
+            "inhabitants": count // 2,
+            "symbols": count,
+            "engine": engine,
+            "seconds": elapsed,
+            "entailed": sorted(s.name for s in symbols if answers[s]),
+            "correct": correct,
+        })
+    return results
+
+
+def print_table(results, sizes, engines):
+    """
+    Print the median time per puzzle for each size and engine.
+    """
+    print(f"{'size':>5}" + "".join(f"{engine:>17}" for engine in engines))
+    for size in sizes:
+        line = f"{size:>5}"
+        for engine in engines:
+            times = [r["seconds"] for r in results
+                     if r["inhabitants"] == size and r["engine"] == engine]
+            cell = f"{statistics.median(times):.5f}s" if times else "-"
+            line += f"{cell:>17}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Compile logical sentences from logic.py into Python functions.
+
+`Sentence.evaluate` walks the object tree with a method call per node and a
+dict lookup per symbol. Compiling a sentence instead generates straight-line
+Python source with one local per distinct subsentence, evaluated over a model
+packed into an integer: bit i holds the value of the i-th symbol. Evaluating
+one model then costs a handful of integer and boolean operations.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class Compiler:
+    """
+    Generates Python source for sentences over a fixed symbol order.
+    """
+
+    def __init__(self, symbols):
+        self.positions = {name: i for i, name in enumerate(symbols)}
+        self.lines = []
+        self.names = dict()
+
+    def emit(self, sentence):
+        """
+        Emit the statements computing `sentence` and return the name of
+        the local holding its value. Equal subsentences are computed once.
+        """
+        if sentence in self.names:
+            return self.names[sentence]
+
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.positions:
+                raise ValueError(f"variable {sentence.name} not in symbols")
+            expression = f"m >> {self.positions[sentence.name]} & 1"
+        elif isinstance(sentence, Not):
+            expression = f"not {self.emit(sentence.operand)}"
+        elif isinstance(sentence, And):
+            operands = [self.emit(c) for c in sentence.conjuncts]
+            expression = " and ".join(operands) if operands else "True"
+        elif isinstance(sentence, Or):
+            operands = [self.emit(d) for d in sentence.disjuncts]
+            expression = " or ".join(operands) if operands else "False"
+        elif isinstance(sentence, Implication):
+            antecedent = self.emit(sentence.antecedent)
+            consequent = self.emit(sentence.consequent)
+            expression = f"not {antecedent} or {consequent}"
+        elif isinstance(sentence, Biconditional):
+            left = self.emit(sentence.left)
+            right = self.emit(sentence.right)
+            expression = f"(not {left}) == (not {right})"
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+        name = f"t{len(self.names)}"
+        self.lines.append(f"{name} = {expression}")
+        self.names[sentence] = name
+        return name
+
+
+def symbol_order(*sentences):
+    """
+    Return a sorted list of the symbol names in `sentences`.
+    """
+    return sorted(set.union(*[s.symbols() for s in sentences]))
+
+
+def encode_model(model, symbols):
+    """
+    Pack a dictionary model into an integer over the order `symbols`.
+    """
+    return sum(1 << i for i, name in enumerate(symbols) if model[name])
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Return a function of a packed integer model that computes the same
+    value as `sentence.evaluate` on the equivalent dictionary model.
+    """
+    compiler = Compiler(symbols)
+    result = compiler.emit(sentence)
+    body = "".join(f"    {line}\n" for line in compiler.lines)
+    source = f"def evaluate(m):\n{body}    return bool({result})\n"
+    return _define(source, "evaluate")
+
+
+def compile_check(knowledge, query, symbols):
+    """
+    Return a function of no arguments that checks every model over
+    `symbols` in one generated loop, returning whether knowledge entails
+    query. The query is only evaluated in models where knowledge holds.
+    """
+    compiler = Compiler(symbols)
+    kb = compiler.emit(knowledge)
+    kb_lines = list(compiler.lines)
+    compiler.lines = []
+    q = compiler.emit(query)
+    q_lines = compiler.lines
+
+    source = "def check():\n"
+    source += f"    for m in range({1 << len(symbols)}):\n"
+    source += "".join(f"        {line}\n" for line in kb_lines)
+    source += f"        if {kb}:\n"
+    source += "".join(f"            {line}\n" for line in q_lines)
+    source += f"            if not {q}:\n"
+    source += "                return False\n"
+    source += "    return True\n"
+    return _define(source, "check")
+
+
+def compiled_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by running compiled code over
+    every model. Drop-in alternative to model_check.
+    """
+    symbols = symbol_order(knowledge, query)
+    return compile_check(knowledge, query, symbols)()
+
+
+def _define(source, name):
+    namespace = dict()
+    exec(compile(source, "<compiled sentence>", "exec"), namespace)
+    return namespace[name]
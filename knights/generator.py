@@ -0,0 +1,110 @@
+"""
+Random knights-and-knaves puzzles.
+
+Every inhabitant is either a knight, who only tells the truth, or a knave,
+who only lies. A puzzle is a set of statements made by inhabitants about
+each other, encoded in the same style as puzzle.py: each inhabitant is
+exactly one of knight or knave, and a statement S by inhabitant X adds
+X is a Knight => S and X is a Knave => ¬S. Statements are random nested
+sentences, and the speaker's role is chosen to match a hidden solution, so
+every generated puzzle is consistent.
+"""
+
+import random
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+def inhabitant_names(count):
+    """
+    Return `count` names: A to Z, then A1 to Z1, and so on.
+    """
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return [
+        letters[i % 26] + (str(i // 26) if i >= 26 else "")
+        for i in range(count)
+    ]
+
+
+def generate_puzzle(inhabitants, statements=None, depth=2, rng=random):
+    """
+    Return (knowledge, symbols, solution) for a random puzzle.
+
+    `inhabitants` people make `statements` statements in total (one each by
+    default), each nested up to `depth` connectives deep. `symbols` lists
+    the knight and knave symbol of every inhabitant, and `solution` maps
+    each symbol name to its value in the hidden solution, which is always
+    a model of `knowledge`.
+    """
+    if statements is None:
+        statements = inhabitants
+    names = inhabitant_names(inhabitants)
+    knights = [Symbol(f"{name} is a Knight") for name in names]
+    knaves = [Symbol(f"{name} is a Knave") for name in names]
+
+    solution = dict()
+    for knight, knave in zip(knights, knaves):
+        is_knight = rng.random() < 0.5
+        solution[knight.name] = is_knight
+        solution[knave.name] = not is_knight
+
+    knowledge = And()
+    for knight, knave in zip(knights, knaves):
+        knowledge.add(Or(knight, knave))
+        knowledge.add(Not(And(knight, knave)))
+
+    atoms = knights + knaves
+    for _ in range(statements):
+        statement = random_sentence(atoms, depth, rng)
+
+        # A statement true in the solution is made by a knight, and a false
+        # one by a knave, so the solution stays a model of the knowledge
+        truthful = statement.evaluate(solution)
+        candidates = [
+            i for i, knight in enumerate(knights)
+            if solution[knight.name] == truthful
+        ] or range(inhabitants)
+        speaker = rng.choice(list(candidates))
+        if solution[knights[speaker].name] != truthful:
+            statement = Not(statement)
+
+        knowledge.add(Implication(knights[speaker], statement))
+        knowledge.add(Implication(knaves[speaker], Not(statement)))
+
+    symbols = [s for pair in zip(knights, knaves) for s in pair]
+    return knowledge, symbols, solution
+
+
+def random_sentence(atoms, depth, rng=random):
+    """
+    Return a random sentence over `atoms`, nested up to `depth` deep.
+    """
+    if depth <= 0 or rng.random() < 0.3:
+        return rng.choice(atoms)
+    kind = rng.randrange(5)
+    if kind == 0:
+        return Not(random_sentence(atoms, depth - 1, rng))
+    if kind == 1:
+        return And(*[random_sentence(atoms, depth - 1, rng)
+                     for _ in range(rng.randint(2, 3))])
+    if kind == 2:
+        return Or(*[random_sentence(atoms, depth - 1, rng)
+                    for _ in range(rng.randint(2, 3))])
+    if kind == 3:
+        return Implication(random_sentence(atoms, depth - 1, rng),
+                           random_sentence(atoms, depth - 1, rng))
+    return Biconditional(random_sentence(atoms, depth - 1, rng),
+                         random_sentence(atoms, depth - 1, rng))
+
+
+def main():
+    knowledge, symbols, solution = generate_puzzle(3)
+    print(knowledge.formula())
+    print()
+    for symbol in symbols:
+        if solution[symbol.name]:
+            print(f"    {symbol}")
+
+
+if __name__ == "__main__":
+    main()
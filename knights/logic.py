@@ -1,7 +1,30 @@
 import itertools
+import weakref
+
+# Every frozen sentence, keyed by its class and immediate parts, so that
+# structurally identical subsentences are built once and shared
+_interned = weakref.WeakValueDictionary()
 
 
 class Sentence():
+    """
+    Base class for immutable logical sentences.
+
+    Sentences are hash-consed: constructing a sentence equal to one that
+    already exists returns the existing object, and hashes and symbol sets
+    are computed once, at construction. The one mutable sentence is an And
+    built directly by the user, so that `And.add` keeps working; whenever
+    such an And becomes part of another sentence, a frozen copy is used.
+    A mutable And's hash is computed when it is first needed after a change.
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -41,17 +64,52 @@ class Sentence():
         else:
             return f"({s})"
 
+    @classmethod
+    def intern(cls, key, fields, hash_value, symbols):
+        """
+        Return the shared sentence for `key`, creating it from `fields`
+        (a dict of slot values) if it does not exist yet.
+        """
+        sentence = _interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_hash", hash_value)
+            object.__setattr__(sentence, "_symbols", symbols)
+            _interned[key] = sentence
+        return sentence
+
+    @classmethod
+    def freeze(cls, sentence):
+        """Validates a subsentence and returns its shared, frozen form."""
+        Sentence.validate(sentence)
+        if isinstance(sentence, And) and not sentence._frozen:
+            return And.intern_conjuncts(sentence.conjuncts)
+        return sentence
+
 
 class Symbol(Sentence):
 
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        return cls.intern(
+            (cls, name), {"name": name},
+            hash(("symbol", name)), frozenset([name])
+        )
+
     def __init__(self, name):
-        self.name = name
+        pass
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __eq__(self, other):
         return isinstance(other, Symbol) and self.name == other.name
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
 
     def __repr__(self):
         return self.name
@@ -66,19 +124,33 @@ class Symbol(Sentence):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        return set(self._symbols)
 
 
 class Not(Sentence):
+
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
+        operand = Sentence.freeze(operand)
+        return cls.intern(
+            (cls, operand), {"operand": operand},
+            hash(("not", operand._hash)), operand._symbols
+        )
+
     def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+        pass
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -90,22 +162,69 @@ class Not(Sentence):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
-        return self.operand.symbols()
+        return set(self._symbols)
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+
+    __slots__ = ("_conjuncts", "_list", "_frozen")
+
+    def __new__(cls, *conjuncts):
+        # An And built directly stays private and mutable through `add`;
+        # only its frozen copies are shared. Its conjuncts are kept in a
+        # list and its symbols in a set, both extended in place, and the
+        # conjunct tuple and hash are only computed when they are needed.
+        sentence = object.__new__(cls)
+        object.__setattr__(sentence, "_list", [])
+        object.__setattr__(sentence, "_symbols", set())
+        object.__setattr__(sentence, "_conjuncts", None)
+        object.__setattr__(sentence, "_hash", None)
+        object.__setattr__(sentence, "_frozen", False)
         for conjunct in conjuncts:
-            Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+            sentence.add(conjunct)
+        return sentence
+
+    def __init__(self, *conjuncts):
+        pass
+
+    @classmethod
+    def intern_conjuncts(cls, conjuncts):
+        """Returns the shared, frozen And of `conjuncts`."""
+        return cls.intern(
+            (cls, conjuncts),
+            {"_conjuncts": conjuncts, "_list": None, "_frozen": True},
+            And.hash_conjuncts(conjuncts), And.union_symbols(conjuncts)
+        )
+
+    @staticmethod
+    def hash_conjuncts(conjuncts):
+        return hash(("and", tuple(conjunct._hash for conjunct in conjuncts)))
+
+    @staticmethod
+    def union_symbols(conjuncts):
+        return frozenset().union(*[c._symbols for c in conjuncts])
+
+    @property
+    def conjuncts(self):
+        if self._conjuncts is None:
+            object.__setattr__(self, "_conjuncts", tuple(self._list))
+        return self._conjuncts
+
+    def __reduce__(self):
+        return (And, self.conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and hash(self) == hash(other)
+            and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self._hash is None:
+            object.__setattr__(
+                self, "_hash", And.hash_conjuncts(self.conjuncts)
+            )
+        return self._hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,8 +233,13 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        if self._frozen:
+            raise TypeError("cannot add to an And shared by other sentences")
+        conjunct = Sentence.freeze(conjunct)
+        self._list.append(conjunct)
+        self._symbols.update(conjunct._symbols)
+        object.__setattr__(self, "_conjuncts", None)
+        object.__setattr__(self, "_hash", None)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -127,22 +251,35 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return set(self._symbols)
 
 
 class Or(Sentence):
+
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
+        disjuncts = tuple(Sentence.freeze(d) for d in disjuncts)
+        return cls.intern(
+            (cls, disjuncts), {"disjuncts": disjuncts},
+            hash(("or", tuple(disjunct._hash for disjunct in disjuncts))),
+            frozenset().union(*[d._symbols for d in disjuncts])
+        )
+
     def __init__(self, *disjuncts):
-        for disjunct in disjuncts:
-            Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        pass
+
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self._hash == other._hash
+            and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self._hash
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -158,23 +295,38 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return set(self._symbols)
 
 
 class Implication(Sentence):
+
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
+        antecedent = Sentence.freeze(antecedent)
+        consequent = Sentence.freeze(consequent)
+        return cls.intern(
+            (cls, antecedent, consequent),
+            {"antecedent": antecedent, "consequent": consequent},
+            hash(("implies", antecedent._hash, consequent._hash)),
+            antecedent._symbols | consequent._symbols
+        )
+
     def __init__(self, antecedent, consequent):
-        Sentence.validate(antecedent)
-        Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        pass
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -189,23 +341,37 @@ class Implication(Sentence):
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return set(self._symbols)
 
 
 class Biconditional(Sentence):
+
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
+        left = Sentence.freeze(left)
+        right = Sentence.freeze(right)
+        return cls.intern(
+            (cls, left, right), {"left": left, "right": right},
+            hash(("biconditional", left._hash, right._hash)),
+            left._symbols | right._symbols
+        )
+
     def __init__(self, left, right):
-        Sentence.validate(left)
-        Sentence.validate(right)
-        self.left = left
-        self.right = right
+        pass
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -222,7 +388,7 @@ class Biconditional(Sentence):
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return set(self._symbols)
 
 
 def model_check(knowledge, query):
@@ -261,3 +427,48 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def model_check_all(knowledge, queries):
+    """
+    Checks which of several queries the knowledge base entails.
+
+    Enumerates the models of the knowledge base once and checks every query
+    against each of them, instead of re-enumerating for every query.
+    Returns a dict mapping each query to whether it is entailed.
+    """
+    queries = list(queries)
+    entailed = {query: True for query in queries}
+
+    def check_all(symbols, model):
+        """Rules out queries that are false in a model of the knowledge base."""
+
+        # If model has an assignment for each symbol
+        if not symbols:
+
+            # Every query must hold in each model of the knowledge base
+            if knowledge.evaluate(model):
+                for query in queries:
+                    if entailed[query] and not query.evaluate(model):
+                        entailed[query] = False
+        else:
+
+            # Choose one of the remaining unused symbols
+            remaining = symbols.copy()
+            p = remaining.pop()
+
+            # Check the models where the symbol is true, then false,
+            # stopping early once no query can still be entailed
+            for value in (True, False):
+                if not any(entailed.values()):
+                    return
+                model[p] = value
+                check_all(remaining, model)
+            del model[p]
+
+    # Get all symbols in the knowledge base and every query
+    symbols = set.union(knowledge.symbols(),
+                        *[query.symbols() for query in queries])
+
+    check_all(symbols, dict())
+    return entailed
@@ -0,0 +1,501 @@
+"""
+CNF compilation and a CDCL SAT solver for the sentences in logic.py.
+
+Sentences are turned into clauses with the Tseitin transformation: every
+compound subsentence gets a fresh variable together with clauses stating
+that the variable is equivalent to the subsentence, so the clause count
+stays linear in the size of the sentence. Literals are nonzero integers,
++v for a variable and -v for its negation, as in DIMACS.
+
+The solver is a conflict-driven clause-learning search with two watched
+literals per clause, first-UIP learning, activity-based branching with
+phase saving, and restarts. Clauses can be added between calls to `solve`,
+which also takes assumptions, so one solver can answer many queries.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class Solver:
+    """
+    Incremental CDCL SAT solver over integer literals.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+
+        # Per-variable state, indexed by variable (index 0 is unused)
+        self.assigns = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+
+        # For each literal, the clauses watching it
+        self.watches = {}
+
+        self.clauses = []
+        self.learnts = []
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.heap = []
+        self.var_inc = 1.0
+
+        # False once the clauses are known to be unsatisfiable on their own
+        self.ok = True
+
+        # Assignment found by the last successful call to solve
+        self.model = None
+
+        # Statistics
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+
+    def new_var(self):
+        """
+        Add a fresh variable and return it.
+        """
+        self.num_vars += 1
+        var = self.num_vars
+        self.assigns.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        self.watches[var] = []
+        self.watches[-var] = []
+        heapq.heappush(self.heap, (0.0, var))
+        return var
+
+    def value(self, lit):
+        """
+        Return True or False if `lit` is assigned, None otherwise.
+        """
+        value = self.assigns[abs(lit)]
+        if value is None or lit > 0:
+            return value
+        return not value
+
+    def add_clause(self, lits):
+        """
+        Add a clause (an iterable of literals) to the solver.
+        Returns False if the clauses have become unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self._cancel_until(0)
+
+        clause = []
+        for lit in lits:
+            while abs(lit) > self.num_vars:
+                self.new_var()
+            if -lit in clause:
+                return True
+            value = self.value(lit)
+            if value is True:
+                return True
+            if value is False or lit in clause:
+                continue
+            clause.append(lit)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._enqueue(clause[0], None)
+            if self._propagate() is not None:
+                self.ok = False
+        else:
+            self._attach(clause)
+            self.clauses.append(clause)
+        return self.ok
+
+    def solve(self, assumptions=()):
+        """
+        Return True if the clauses are satisfiable with every literal in
+        `assumptions` true, storing the satisfying assignment in `self.model`.
+        Learned clauses are kept for later calls.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        assumptions = list(assumptions)
+        for lit in assumptions:
+            while abs(lit) > self.num_vars:
+                self.new_var()
+
+        restart_limit = 100
+        conflicts_since_restart = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts_since_restart += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, level = self._analyze(conflict)
+                self._cancel_until(level)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._attach(learnt)
+                    self.learnts.append(learnt)
+                    self._enqueue(learnt[0], learnt)
+                self._decay_activity()
+                if conflicts_since_restart >= restart_limit:
+                    conflicts_since_restart = 0
+                    restart_limit = int(restart_limit * 1.5)
+                    self._cancel_until(0)
+                continue
+
+            # Assumptions are decided first, one per decision level
+            if len(self.trail_lim) < len(assumptions):
+                lit = assumptions[len(self.trail_lim)]
+                value = self.value(lit)
+                if value is False:
+                    self._cancel_until(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value is None:
+                    self._enqueue(lit, None)
+                continue
+
+            var = self._pick_branch_var()
+            if var is None:
+                self.model = list(self.assigns)
+                self._cancel_until(0)
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self._enqueue(var if self.phases[var] else -var, None)
+
+    def _attach(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def _enqueue(self, lit, reason):
+        var = abs(lit)
+        self.assigns[var] = lit > 0
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(lit)
+
+    def _propagate(self):
+        """
+        Propagate every pending assignment through the watched literals.
+        Returns a conflicting clause, or None if there is no conflict.
+        """
+        trail = self.trail
+        watches = self.watches
+        value = self.value
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            watching = watches[false_lit]
+            watches[false_lit] = kept = []
+            i = 0
+            while i < len(watching):
+                clause = watching[i]
+                i += 1
+
+                # Keep the false literal in the second watched position
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                if value(first) is True:
+                    kept.append(clause)
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    if value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], false_lit
+                        watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if value(first) is False:
+                        kept.extend(watching[i:])
+                        self.qhead = len(trail)
+                        return clause
+                    self._enqueue(first, clause)
+        return None
+
+    def _analyze(self, conflict):
+        """
+        Derive the first-UIP clause from `conflict`.
+        Returns the learned clause, asserting literal first, and the level
+        to backjump to.
+        """
+        current = len(self.trail_lim)
+        learnt = [None]
+        seen = set()
+        counter = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in clause:
+                if q == lit:
+                    continue
+                var = abs(q)
+                if var not in seen and self.levels[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if self.levels[var] == current:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            seen.discard(abs(lit))
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.reasons[abs(lit)]
+        learnt[0] = -lit
+
+        # Backjump to the second highest level in the clause
+        level = 0
+        if len(learnt) > 1:
+            best = max(range(1, len(learnt)),
+                       key=lambda k: self.levels[abs(learnt[k])])
+            learnt[1], learnt[best] = learnt[best], learnt[1]
+            level = self.levels[abs(learnt[1])]
+        return learnt, level
+
+    def _cancel_until(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in reversed(self.trail[start:]):
+            var = abs(lit)
+            self.phases[var] = self.assigns[var]
+            self.assigns[var] = None
+            self.reasons[var] = None
+            heapq.heappush(self.heap, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def _pick_branch_var(self):
+        while self.heap:
+            _, var = heapq.heappop(self.heap)
+            if self.assigns[var] is None:
+                return var
+        return None
+
+    def _bump(self, var):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.var_inc *= 1e-100
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, self.num_vars + 1)
+                         if self.assigns[v] is None]
+            heapq.heapify(self.heap)
+        elif self.assigns[var] is None:
+            heapq.heappush(self.heap, (-self.activity[var], var))
+
+    def _decay_activity(self):
+        self.var_inc /= 0.95
+
+
+class Encoder:
+    """
+    Tseitin encoder from logical sentences into a `Solver`'s clauses.
+
+    Each symbol maps to one variable and each distinct compound subsentence
+    to one defined variable, so sentences shared between calls are only
+    encoded once.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = Solver() if solver is None else solver
+        self.variables = dict()
+        self.cache = dict()
+        self.true = None
+
+    def add(self, sentence):
+        """
+        Add clauses asserting that `sentence` is true.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.solver.add_clause([
+                -self.literal(sentence.antecedent),
+                self.literal(sentence.consequent),
+            ])
+        elif (isinstance(sentence, Not)
+              and isinstance(sentence.operand, Not)):
+            self.add(sentence.operand.operand)
+        elif isinstance(sentence, Not) and isinstance(sentence.operand, Or):
+            for disjunct in sentence.operand.disjuncts:
+                self.add(Not(disjunct))
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """
+        Return a literal equivalent to `sentence`, adding its defining
+        clauses if it has not been encoded before.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.cache:
+            return self.cache[sentence]
+
+        add_clause = self.solver.add_clause
+        if isinstance(sentence, And):
+            if not sentence.conjuncts:
+                return self._true()
+            lits = [self.literal(c) for c in sentence.conjuncts]
+            x = self.solver.new_var()
+            for lit in lits:
+                add_clause([-x, lit])
+            add_clause([x] + [-lit for lit in lits])
+        elif isinstance(sentence, Or):
+            if not sentence.disjuncts:
+                return -self._true()
+            lits = [self.literal(d) for d in sentence.disjuncts]
+            x = self.solver.new_var()
+            for lit in lits:
+                add_clause([x, -lit])
+            add_clause([-x] + lits)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            x = self.solver.new_var()
+            add_clause([-x, -a, b])
+            add_clause([x, a])
+            add_clause([x, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            x = self.solver.new_var()
+            add_clause([-x, -a, b])
+            add_clause([-x, a, -b])
+            add_clause([x, a, b])
+            add_clause([x, -a, -b])
+        else:
+            raise TypeError(f"cannot encode {type(sentence).__name__}")
+
+        self.cache[sentence] = x
+        return x
+
+    def variable(self, name):
+        """
+        Return the variable for the symbol called `name`.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_var()
+        return self.variables[name]
+
+    def model(self):
+        """
+        Return the solver's last model as a dictionary of symbol values.
+        """
+        if self.solver.model is None:
+            return None
+        return {
+            name: bool(self.solver.model[var])
+            for name, var in self.variables.items()
+        }
+
+    def _true(self):
+        if self.true is None:
+            self.true = self.solver.new_var()
+            self.solver.add_clause([self.true])
+        return self.true
+
+
+def to_cnf(sentence):
+    """
+    Return (clauses, variables) for `sentence`: a list of clauses, each a
+    list of integer literals, that is satisfiable exactly when `sentence`
+    is, and a dictionary from symbol name to variable.
+    """
+    encoder = Encoder()
+    encoder.add(sentence)
+    solver = encoder.solver
+    if not solver.ok:
+        return [[]], encoder.variables
+    units = [[lit] for lit in solver.trail]
+    return units + solver.clauses, encoder.variables
+
+
+def sat_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, by checking that
+    knowledge ∧ ¬query is unsatisfiable. Drop-in alternative to model_check.
+    """
+    encoder = Encoder()
+    encoder.add(knowledge)
+    encoder.add(Not(query))
+    return not encoder.solver.solve()
+
+
+class KnowledgeBase:
+    """
+    Knowledge base that answers entailment queries incrementally.
+
+    Sentences added with `add` are encoded into one long-lived solver, so the
+    clauses it learns while answering one query keep speeding up later ones.
+    Queries and assumptions are passed to the solver as assumptions rather
+    than clauses, which leaves the knowledge base itself unchanged.
+    """
+
+    def __init__(self, *sentences):
+        self.encoder = Encoder()
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Add `sentence` to the knowledge base.
+        """
+        self.encoder.add(sentence)
+
+    def satisfiable(self, assumptions=()):
+        """
+        Return whether the knowledge base is consistent with every sentence
+        in `assumptions` being true.
+        """
+        lits = [self.encoder.literal(a) for a in assumptions]
+        return self.encoder.solver.solve(lits)
+
+    def entails(self, query, assumptions=()):
+        """
+        Return whether the knowledge base, together with every sentence in
+        `assumptions`, entails `query`.
+        """
+        lits = [self.encoder.literal(a) for a in assumptions]
+        lits.append(-self.encoder.literal(query))
+        return not self.encoder.solver.solve(lits)
+
+    def entails_all(self, queries, assumptions=()):
+        """
+        Return a dict mapping each of `queries` to whether it is entailed.
+        """
+        return {query: self.entails(query, assumptions) for query in queries}
+
+    def model(self):
+        """
+        Return the model found by the last satisfiable query, if any.
+        """
+        return self.encoder.model()
@@ -0,0 +1,100 @@
+"""
+Bit-parallel truth tables for the sentences in logic.py.
+
+With n symbols there are 2^n models. A sentence's truth table is stored as
+one Python integer of 2^n bits, where bit m is the sentence's value in model
+m (symbol i is true in model m exactly when bit i of m is set). Connectives
+become bitwise operations over all models at once, and knowledge entails a
+query exactly when (knowledge & ~query) has no bits set.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Largest number of symbols accepted by default (2^26 bits is 8 MiB per table)
+MAX_SYMBOLS = 26
+
+
+class TruthTable:
+    """
+    Truth tables over a fixed list of symbol names.
+    """
+
+    def __init__(self, symbols, max_symbols=MAX_SYMBOLS):
+        symbols = list(symbols)
+        if len(symbols) > max_symbols:
+            raise ValueError(
+                f"{len(symbols)} symbols exceeds the limit of {max_symbols}"
+            )
+        self.symbols = symbols
+        self.size = 1 << len(symbols)
+        self.full = (1 << self.size) - 1
+        self.cache = dict()
+        self.columns = {
+            name: self.column(i) for i, name in enumerate(symbols)
+        }
+
+    def column(self, i):
+        """
+        Return the table of the i-th symbol: runs of 2^i zeros and 2^i ones.
+        """
+        run = 1 << i
+        vector = ((1 << run) - 1) << run
+        length = run << 1
+        while length < self.size:
+            vector |= vector << length
+            length <<= 1
+        return vector
+
+    def vector(self, sentence):
+        """
+        Return the truth table of `sentence`.
+        """
+        if sentence in self.cache:
+            return self.cache[sentence]
+
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.columns:
+                raise Exception(f"variable {sentence.name} not in model")
+            result = self.columns[sentence.name]
+        elif isinstance(sentence, Not):
+            result = self.full ^ self.vector(sentence.operand)
+        elif isinstance(sentence, And):
+            result = self.full
+            for conjunct in sentence.conjuncts:
+                result &= self.vector(conjunct)
+        elif isinstance(sentence, Or):
+            result = 0
+            for disjunct in sentence.disjuncts:
+                result |= self.vector(disjunct)
+        elif isinstance(sentence, Implication):
+            result = ((self.full ^ self.vector(sentence.antecedent))
+                      | self.vector(sentence.consequent))
+        elif isinstance(sentence, Biconditional):
+            result = self.full ^ (self.vector(sentence.left)
+                                  ^ self.vector(sentence.right))
+        else:
+            raise TypeError(f"cannot evaluate {type(sentence).__name__}")
+
+        self.cache[sentence] = result
+        return result
+
+    def entails(self, knowledge, query):
+        """
+        Return whether `query` holds in every model of `knowledge`.
+        """
+        return self.vector(knowledge) & ~self.vector(query) == 0
+
+    def models(self, sentence):
+        """
+        Return the number of models in which `sentence` is true.
+        """
+        return bin(self.vector(sentence)).count("1")
+
+
+def truth_table_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, evaluating both over every model
+    at once. Drop-in alternative to model_check for up to MAX_SYMBOLS symbols.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    return TruthTable(symbols).entails(knowledge, query)
@@ -0,0 +1,191 @@
+"""
+Headless benchmark of the Minesweeper AI.
+
+Plays many games of Minesweeper with MinesweeperAI across a process pool,
+each game seeded so a run can be repeated exactly. The AI makes a safe move
+when it knows one and a random move otherwise, and wins by revealing every
+safe cell. A move with no mines around it reveals the whole region it opens,
+which the AI learns in one add_knowledge_batch call (or, with --unbatched,
+one add_knowledge call per cell). Reports the win rate, moves per second,
+time per knowledge update and the size of the knowledge base, as a table and
+optionally as JSON.
+
+Usage: python benchmark.py --level beginner,expert -n 200
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import statistics
+import time
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# (height, width, mines) of the standard difficulty levels
+LEVELS = {
+    "beginner": (9, 9, 10),
+    "intermediate": (16, 16, 40),
+    "expert": (16, 30, 99),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Minesweeper AI on simulated games."
+    )
+    parser.add_argument("--level", default=",".join(LEVELS),
+                        help="comma-separated levels to play, from "
+                             f"{', '.join(LEVELS)}")
+    parser.add_argument("--size", metavar="HxWxM",
+                        help="play a custom height x width board with M "
+                             "mines instead of the levels")
+    parser.add_argument("-n", "--games", type=int, default=100,
+                        help="games per level")
+    parser.add_argument("--unbatched", action="store_true",
+                        help="learn revealed regions one cell at a time")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if args.size:
+        try:
+            height, width, mines = (int(n) for n in args.size.split("x"))
+        except ValueError:
+            parser.error(f"bad size {args.size}, expected HxWxM")
+        if mines >= height * width:
+            parser.error("there must be fewer mines than cells")
+        levels = {args.size: (height, width, mines)}
+    else:
+        levels = {}
+        for level in args.level.split(","):
+            if level not in LEVELS:
+                parser.error(f"unknown level {level}")
+            levels[level] = LEVELS[level]
+
+    jobs = [
+        (level, *levels[level], args.seed * 1000003 + game, args.unbatched)
+        for level in levels
+        for game in range(args.games)
+    ]
+
+    with multiprocessing.Pool(args.workers) as pool:
+        games = list(pool.imap_unordered(play_game, jobs))
+
+    report = {
+        level: summarize([g for g in games if g["level"] == level])
+        for level in levels
+    }
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def play_game(job):
+    """
+    Plays one seeded game and returns its record: whether it was won, the
+    number of moves, the time taken, and the time and knowledge base size
+    after every knowledge update.
+    """
+    level, height, width, mines, seed, unbatched = job
+    random.seed(seed)
+    game = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+    safe_cells = height * width - mines
+
+    updates = []
+    sizes = []
+    moves = 0
+    won = False
+    start = time.perf_counter()
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                break
+        moves += 1
+        if game.is_mine(move):
+            break
+
+        cells_with_counts = game.reveal(move)
+        update_start = time.perf_counter()
+        if unbatched:
+            for cell, count in cells_with_counts:
+                ai.add_knowledge(cell, count)
+        else:
+            ai.add_knowledge_batch(cells_with_counts)
+        updates.append(time.perf_counter() - update_start)
+        sizes.append(len(ai.knowledge))
+
+        if len(ai.moves_made) == safe_cells:
+            won = True
+            break
+    elapsed = time.perf_counter() - start
+
+    return {
+        "level": level,
+        "seed": seed,
+        "won": won,
+        "moves": moves,
+        "seconds": elapsed,
+        "updates": updates,
+        "sizes": sizes,
+    }
+
+
+def summarize(games):
+    """
+    Aggregates the records of the games played at one level.
+    """
+    updates = sorted(t for g in games for t in g["updates"])
+    sizes = sorted(s for g in games for s in g["sizes"])
+    moves = sum(g["moves"] for g in games)
+    seconds = sum(g["seconds"] for g in games)
+    return {
+        "games": len(games),
+        "wins": sum(g["won"] for g in games),
+        "win_rate": statistics.fmean(g["won"] for g in games),
+        "moves": moves,
+        "moves_per_second": moves / seconds if seconds else None,
+        "update_seconds": distribution(updates),
+        "knowledge_size": distribution(sizes),
+    }
+
+
+def distribution(values):
+    """
+    Returns the mean, median, 95th percentile and maximum of sorted values.
+    """
+    if not values:
+        return None
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values),
+        "p50": values[len(values) // 2],
+        "p95": values[min(len(values) - 1, int(0.95 * len(values)))],
+        "max": values[-1],
+    }
+
+
+def print_report(report):
+    """
+    Prints one line of results per level.
+    """
+    print(f"{'level':>14} {'games':>6} {'win rate':>9} {'moves/s':>9} "
+          f"{'update ms':>10} {'p95 ms':>8} {'kb size':>8} {'kb max':>7}")
+    for level, r in report.items():
+        updates = r["update_seconds"] or {"mean": 0, "p95": 0}
+        sizes = r["knowledge_size"] or {"mean": 0, "max": 0}
+        moves_per_second = r["moves_per_second"] or 0
+        print(f"{level:>14} {r['games']:>6} {r['win_rate']:>9.1%} "
+              f"{moves_per_second:>9.0f} {updates['mean'] * 1000:>10.3f} "
+              f"{updates['p95'] * 1000:>8.3f} {sizes['mean']:>8.1f} "
+              f"{sizes['max']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 import itertools
+import math
 import random
+import sys
 
 
 class Minesweeper:
     """
     Minesweeper game representation
+
+    Cell (i, j) is number i * width + j. Mines are held as a bitmask over
+    those numbers, and the number of mines around every cell is counted
+    once, when the mines are placed.
     """
 
     def __init__(self, height=8, width=8, mines=8):
@@ -12,27 +18,40 @@ class Minesweeper:
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
-
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, as distinct cells drawn in one go
+        positions = random.sample(range(height * width), mines)
+        self.mine_mask = 0
+        for position in positions:
+            self.mine_mask |= 1 << position
+        self.mines = set(divmod(position, width) for position in positions)
+
+        # Count the mines around every cell by adding each mine to its
+        # neighbours
+        self.counts = bytearray(height * width)
+        for i, j in self.mines:
+            for row in range(max(i - 1, 0), min(i + 2, height)):
+                for col in range(max(j - 1, 0), min(j + 2, width)):
+                    if (row, col) != (i, j):
+                        self.counts[row * width + col] += 1
+
+        # Cells revealed by reveal
+        self.revealed = bytearray(height * width)
 
         # At first, player has found no mines
         self.mines_found = set()
 
+    @property
+    def board(self):
+        """
+        Returns the board as rows of booleans, True where there is a mine.
+        """
+        return [
+            [bool(self.mine_mask >> (i * self.width + j) & 1)
+             for j in range(self.width)]
+            for i in range(self.height)
+        ]
+
     def print(self):
         """
         Prints a text-based representation
@@ -41,7 +60,7 @@ class Minesweeper:
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.is_mine((i, j)):
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -51,9 +70,7 @@ class Minesweeper:
     def is_mine(self, cell):
         # cell is a tuple that contains the coordinates of the cell in the board. (i,j)
         i, j = cell
-        return self.board[i][j]
-        # Self.board will return True if there is a mine in that cell
-        # Self.board will return False if there is no mine in that cell
+        return bool(self.mine_mask >> (i * self.width + j) & 1)
 
     def nearby_mines(self, cell):
         """
@@ -61,24 +78,37 @@ class Minesweeper:
         within one row and column of a given cell,
         not including the cell itself.
         """
+        i, j = cell
+        return self.counts[i * self.width + j]
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+    def reveal(self, cell):
+        """
+        Reveals a safe cell, and when no mines are near it, every cell
+        around it in turn, as far as the region of such cells reaches.
+        Returns the list of (cell, nearby mines) for the cells newly
+        revealed.
+        """
+        width = self.width
+        start = cell[0] * width + cell[1]
+        if self.revealed[start]:
+            return []
+        self.revealed[start] = 1
+        found = []
+        stack = [start]
+        while stack:
+            position = stack.pop()
+            count = self.counts[position]
+            i, j = divmod(position, width)
+            found.append(((i, j), count))
+            if count:
+                continue
+            for row in range(max(i - 1, 0), min(i + 2, self.height)):
+                for col in range(max(j - 1, 0), min(j + 2, width)):
+                    neighbour = row * width + col
+                    if not self.revealed[neighbour]:
+                        self.revealed[neighbour] = 1
+                        stack.append(neighbour)
+        return found
 
     def won(self):
         """
@@ -87,22 +117,95 @@ class Minesweeper:
         return self.mines_found == self.mines
 
 
+def cell_bit(cell):
+    """
+    Returns the bit that stands for a cell in a sentence's mask.
+    Cells are numbered along anti-diagonals (the Cantor pairing of i and j),
+    so the numbering does not depend on the size of the board.
+    """
+    i, j = cell
+    return (i + j) * (i + j + 1) // 2 + j
+
+
+def bit_cell(bit):
+    """
+    Returns the cell that a bit of a sentence's mask stands for.
+    """
+    diagonal = (math.isqrt(8 * bit + 1) - 1) // 2
+    j = bit - diagonal * (diagonal + 1) // 2
+    return (diagonal - j, j)
+
+
+def mask_bits(mask):
+    """
+    Yields the index of every bit set in a mask.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
 class Sentence:
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    The cells are held as a bitmask, with a bit per cell given by cell_bit.
+    Sentences hash by value, so a sentence must not be marked while it is
+    stored in a set or as a dictionary key.
     """
 
+    __slots__ = ("mask", "count")
+
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        mask = 0
+        for cell in cells:
+            mask |= 1 << cell_bit(cell)
+        self.mask = mask
         self.count = count
 
+    @classmethod
+    def from_mask(cls, mask, count):
+        """
+        Returns the sentence about the cells of a bitmask.
+        """
+        sentence = cls.__new__(cls)
+        sentence.mask = mask
+        sentence.count = count
+        return sentence
+
+    @property
+    def cells(self):
+        return frozenset(bit_cell(bit) for bit in mask_bits(self.mask))
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        return self.mask == other.mask and self.count == other.count
+
+    def __hash__(self):
+        return hash((self.mask, self.count))
+
+    def __len__(self):
+        return self.mask.bit_count()
 
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(self.cells)} = {self.count}"
+
+    def issubset(self, other):
+        """
+        Returns True if every cell of this sentence is in `other`.
+        """
+        return self.mask & ~other.mask == 0
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of this sentence that are not
+        in `other`, a subset of it.
+        """
+        return Sentence.from_mask(
+            self.mask & ~other.mask, self.count - other.count
+        )
 
     def known_mines(self):
         """
@@ -110,7 +213,7 @@ class Sentence:
         """
         # Para um set de cells com comprimento x, se o valor encontrado na variavel count for igual a x, entao todas as cells sao minas.
         # Isto porque a variavel count vai ser igual ao numero de minas (celulas com o valor True) que existam adjacentes a uma cell.
-        if len(self.cells) == self.count and self.count != 0:
+        if len(self) == self.count and self.count != 0:
             return self.cells
         return set()
 
@@ -130,8 +233,9 @@ class Sentence:
         a cell is known to be a mine.
         """
         # Se a cell está no set de cells, remove-a e decrementa o count, pois uma mina foi encontrada.
-        if cell in self.cells:
-            self.cells.remove(cell)
+        bit = 1 << cell_bit(cell)
+        if self.mask & bit:
+            self.mask ^= bit
             self.count -= 1
 
     def mark_safe(self, cell):
@@ -140,8 +244,184 @@ class Sentence:
         a cell is known to be safe.
         """
         # Se a cell está no set de cells, remove-a apenas.
-        if cell in self.cells:
-            self.cells.remove(cell)
+        bit = 1 << cell_bit(cell)
+        if self.mask & bit:
+            self.mask ^= bit
+
+
+class KnowledgeBase:
+    """
+    Set of distinct, non-empty sentences, with an index from each cell's bit
+    to the sentences containing it.
+    """
+
+    def __init__(self):
+        self.sentences = dict()
+        self.index = dict()
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        return iter(self.sentences)
+
+    def __contains__(self, sentence):
+        return sentence in self.sentences
+
+    def get(self, sentence):
+        """
+        Returns the stored sentence equal to `sentence`, or None.
+        """
+        return self.sentences.get(sentence)
+
+    def add(self, sentence):
+        """
+        Adds a sentence unless it is empty or already known.
+        Returns True if it was added.
+        """
+        if not sentence.mask or sentence in self.sentences:
+            return False
+        self.sentences[sentence] = sentence
+        for bit in mask_bits(sentence.mask):
+            self.index.setdefault(bit, set()).add(sentence)
+        return True
+
+    def discard(self, sentence):
+        """
+        Removes a stored sentence.
+        """
+        del self.sentences[sentence]
+        for bit in mask_bits(sentence.mask):
+            sentences = self.index[bit]
+            sentences.remove(sentence)
+            if not sentences:
+                del self.index[bit]
+
+    def overlapping(self, sentence):
+        """
+        Returns the other stored sentences that share a cell with `sentence`.
+        """
+        found = set()
+        for bit in mask_bits(sentence.mask):
+            found.update(self.index.get(bit, ()))
+        found.discard(sentence)
+        return found
+
+    def mark_mine(self, cell):
+        """
+        Marks a cell as a mine in every sentence containing it, dropping
+        sentences that become empty or duplicates.
+        Returns the sentences that changed and were kept.
+        """
+        return self.mark(cell, Sentence.mark_mine)
+
+    def mark_safe(self, cell):
+        """
+        Marks a cell as safe in every sentence containing it, dropping
+        sentences that become empty or duplicates.
+        Returns the sentences that changed and were kept.
+        """
+        return self.mark(cell, Sentence.mark_safe)
+
+    def mark(self, cell, update):
+        """
+        Applies `update` for a cell to every sentence containing it.
+        """
+        changed = []
+        for sentence in list(self.index.get(cell_bit(cell), ())):
+            # Take the sentence out while it changes, as its hash changes
+            self.discard(sentence)
+            update(sentence, cell)
+            if self.add(sentence):
+                changed.append(sentence)
+        return changed
+
+
+def choose(n, k):
+    """
+    Returns the number of ways to choose k of n things, 0 if there are none.
+    """
+    if k < 0 or k > n:
+        return 0
+    return math.comb(n, k)
+
+
+def convolve(a, b):
+    """
+    Returns the distribution of the total of two independent counts, each
+    given as a list of the number of ways to reach every total.
+    """
+    total = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                total[i + j] += x * y
+    return total
+
+
+def count_solutions(cells, sentences):
+    """
+    Counts the mine placements over `cells` that satisfy every sentence,
+    where every sentence only mentions cells in `cells`.
+
+    Returns (ways, mines): ways[k] is the number of placements with k mines,
+    and mines[k][i] is how many of those have a mine on cells[i].
+
+    Cells are assigned in order, and the placements of the remaining cells
+    only depend on how many mines each sentence still needs, so the count
+    for each (position, needs) state is computed once. With cells in
+    breadth-first order only a narrow band of sentences is open at a time.
+    """
+    n = len(cells)
+    position = {cell: i for i, cell in enumerate(cells)}
+
+    # For each cell, the sentences containing it with how many of their
+    # cells come after it
+    touching = [[] for _ in range(n)]
+    for s, sentence in enumerate(sentences):
+        indices = sorted(position[cell] for cell in sentence.cells)
+        for rank, i in enumerate(indices):
+            touching[i].append((s, len(indices) - rank - 1))
+
+    memo = dict()
+
+    def solve(p, needs):
+        if p == n:
+            return {0: [1, []]}
+        key = (p, needs)
+        if key in memo:
+            return memo[key]
+        table = dict()
+        for mine in (0, 1):
+            new_needs = list(needs)
+            for s, remaining in touching[p]:
+                new_needs[s] -= mine
+                if not 0 <= new_needs[s] <= remaining:
+                    break
+            else:
+                for k, (ways, counts) in solve(p + 1, tuple(new_needs)).items():
+                    entry = table.setdefault(k + mine, [0, [0] * (n - p)])
+                    entry[0] += ways
+                    entry[1][0] += ways * mine
+                    row = entry[1]
+                    for i, count in enumerate(counts, 1):
+                        row[i] += count
+        memo[key] = table
+        return table
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, n + 100))
+    try:
+        table = solve(0, tuple(sentence.count for sentence in sentences))
+    finally:
+        sys.setrecursionlimit(limit)
+
+    ways = [0] * (n + 1)
+    mines = [[0] * n for _ in range(n + 1)]
+    for k, (count, counts) in table.items():
+        ways[k] = count
+        mines[k] = counts
+    return ways, mines
 
 
 class MinesweeperAI:
@@ -149,12 +429,16 @@ class MinesweeperAI:
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Total number of mines on the board, if known, which lets random
+        # moves use the probability of each cell holding a mine
+        self.total_mines = mines
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -162,8 +446,11 @@ class MinesweeperAI:
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Set of sentences about the game known to be true
+        self.knowledge = KnowledgeBase()
+
+        # Sentences added or changed since they were last used for inference
+        self.pending = []
 
     def mark_mine(self, cell):
         """
@@ -171,8 +458,7 @@ class MinesweeperAI:
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.pending.extend(self.knowledge.mark_mine(cell))
 
     def mark_safe(self, cell):
         """
@@ -180,8 +466,44 @@ class MinesweeperAI:
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        self.pending.extend(self.knowledge.mark_safe(cell))
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base unless it is empty or
+        already known.
+        """
+        if self.knowledge.add(sentence):
+            self.pending.append(sentence)
+
+    def propagate(self):
+        """
+        Draws conclusions from the pending sentences until there are none
+        left. A sentence is only compared with the sentences it shares
+        cells with, since no other sentence can be its subset or superset,
+        and sentences changed by marking cells are queued again.
+        """
+        while self.pending:
+            sentence = self.pending.pop()
+            if self.knowledge.get(sentence) is not sentence:
+                continue
+
+            # Check known safes/mines
+            safes = list(sentence.known_safes())
+            mines = list(sentence.known_mines())
+            if safes or mines:
+                for cell in safes:
+                    self.mark_safe(cell)
+                for cell in mines:
+                    self.mark_mine(cell)
+                continue
+
+            # Subset inference
+            for other in self.knowledge.overlapping(sentence):
+                if sentence.issubset(other):
+                    self.add_sentence(other.difference(sentence))
+                elif other.issubset(sentence):
+                    self.add_sentence(sentence.difference(other))
 
     def add_knowledge(self, cell, count):
         """
@@ -198,15 +520,35 @@ class MinesweeperAI:
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
-        # 1. Mark the cell as a move that has been made
-        self.moves_made.add(cell)
+        self.add_knowledge_batch([(cell, count)])
 
-        # 2. Mark the cell as safe
-        self.mark_safe(cell)
+    def add_knowledge_batch(self, cells_with_counts):
+        """
+        Does the same as add_knowledge for every (cell, count) pair, such as
+        the cells revealed together by Minesweeper.reveal, but draws
+        conclusions once for the whole batch instead of once per cell.
+        """
+        cells_with_counts = list(cells_with_counts)
+
+        # 1 & 2. Mark every cell as a move that has been made and as safe,
+        # so that no sentence of the batch includes another batch cell
+        for cell, _ in cells_with_counts:
+            self.moves_made.add(cell)
+            self.mark_safe(cell)
 
         # 3. Add a new sentence to the AI's knowledge base
-        # based on the value of `cell` and `count`
+        # based on the value of each `cell` and `count`
+        for cell, count in cells_with_counts:
+            self.add_sentence(self.neighbour_sentence(cell, count))
+
+        # 4 & 5. Repeat inference until no more progress
+        self.propagate()
 
+    def neighbour_sentence(self, cell, count):
+        """
+        Returns the sentence that `count` of the neighbours of `cell` are
+        mines, leaving out neighbours already known to be safe or mines.
+        """
         # Find neighbors of cell to create a sentence. Loop over all cells
         # within one row and column and check if neighbor is in bounds and is unconfirmed
         unconfirmed_cells = set()
@@ -232,48 +574,7 @@ class MinesweeperAI:
 
         # Creating sentence object with all unconfirmed neighbors and
         # number of mines around the cell minus number of known mines (already flagged)
-        new_sentence = Sentence(unconfirmed_cells, count)
-
-        # Add a new sentence to the knowledge base:
-        self.knowledge.append(new_sentence)
-
-        # 4 & 5. Repeat inference until no more progress
-        changed = True
-        while changed:
-            changed = False
-
-            # Check known safes/mines
-            for sentence in self.knowledge:
-                for cell in sentence.known_safes().copy():
-                    if cell not in self.safes:
-                        self.mark_safe(cell)
-                        changed = True
-                for cell in sentence.known_mines().copy():
-                    if cell not in self.mines:
-                        self.mark_mine(cell)
-                        changed = True
-
-            # Subset inference
-            new_sentences = []
-            for s1 in self.knowledge:
-                for s2 in self.knowledge:
-                    if s1 == s2:
-                        continue
-                    if s1.cells.issubset(s2.cells):
-                        new_sentence = Sentence(
-                            s2.cells - s1.cells, s2.count - s1.count
-                        )
-                        if (
-                            new_sentence not in self.knowledge
-                            and new_sentence not in new_sentences
-                        ):
-                            new_sentences.append(new_sentence)
-            if new_sentences:
-                self.knowledge.extend(new_sentences)
-                changed = True
-
-        # Remove empty sentences
-        self.knowledge = [s for s in self.knowledge if s.cells]
+        return Sentence(unconfirmed_cells, count)
 
     def make_safe_move(self):
         """
@@ -295,6 +596,8 @@ class MinesweeperAI:
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+        When the number of mines is known, chooses randomly among those
+        cells least likely to hold a mine.
         """
         possible_cells = []
 
@@ -306,4 +609,114 @@ class MinesweeperAI:
 
         if len(possible_cells) == 0:
             return None
+
+        if self.total_mines is not None:
+            probabilities = self.mine_probabilities()
+            if probabilities:
+                # Cells left without a probability are known to be safe
+                chances = {
+                    cell: probabilities.get(cell, 0.0)
+                    for cell in possible_cells
+                }
+                lowest = min(chances.values())
+                possible_cells = [
+                    cell for cell in possible_cells
+                    if chances[cell] <= lowest + 1e-12
+                ]
         return random.choice(possible_cells)
+
+    def mine_probabilities(self):
+        """
+        Returns the probability that each cell not known to be safe or a
+        mine holds one, given the knowledge and the total number of mines,
+        with every consistent placement of the mines equally likely.
+        Returns None if the total is unknown or the knowledge admits no
+        placement.
+
+        Cells in sentences are split into components that share no
+        sentence, and each component's placements are counted by number
+        of mines. The components and the cells outside every sentence are
+        then combined through the number of mines left over.
+        """
+        if self.total_mines is None:
+            return None
+
+        # Split the sentences into components linked by shared cells
+        components = []
+        seen = set()
+        for start in self.knowledge:
+            if start in seen:
+                continue
+            seen.add(start)
+            sentences = []
+            cells = []
+            placed = set()
+            queue = [start]
+            while queue:
+                sentence = queue.pop(0)
+                sentences.append(sentence)
+                for cell in sorted(sentence.cells):
+                    if cell not in placed:
+                        placed.add(cell)
+                        cells.append(cell)
+                for other in self.knowledge.overlapping(sentence):
+                    if other not in seen:
+                        seen.add(other)
+                        queue.append(other)
+            ways, mines = count_solutions(cells, sentences)
+            components.append((cells, ways, mines))
+
+        unknown = [
+            (i, j)
+            for i in range(self.height)
+            for j in range(self.width)
+            if (i, j) not in self.mines and (i, j) not in self.safes
+        ]
+        frontier = set(cell for cells, _, _ in components for cell in cells)
+        others = len(unknown) - len(frontier)
+        left = self.total_mines - len(self.mines)
+
+        # Total placements across all components by number of mines, and for
+        # each component the same for all the others
+        everything = [1]
+        rest = []
+        for c in range(len(components)):
+            others_ways = [1]
+            for d, (_, ways, _) in enumerate(components):
+                if d != c:
+                    others_ways = convolve(others_ways, ways)
+            rest.append(others_ways)
+            everything = convolve(everything, components[c][1])
+
+        total = sum(
+            ways * choose(others, left - k) for k, ways in enumerate(everything)
+        )
+        if total == 0:
+            return None
+
+        probabilities = dict()
+        for (cells, ways, mines), others_ways in zip(components, rest):
+            for k in range(len(ways)):
+                if not ways[k]:
+                    continue
+                weight = sum(
+                    w * choose(others, left - k - j)
+                    for j, w in enumerate(others_ways)
+                )
+                for cell, count in zip(cells, mines[k]):
+                    probabilities[cell] = (
+                        probabilities.get(cell, 0) + count * weight
+                    )
+        for cell in frontier:
+            probabilities[cell] = probabilities.get(cell, 0) / total
+
+        # Every cell outside the sentences is equally likely to be a mine
+        if others:
+            expected = sum(
+                ways * choose(others - 1, left - k - 1)
+                for k, ways in enumerate(everything)
+            )
+            for cell in unknown:
+                if cell not in frontier:
+                    probabilities[cell] = expected / total
+        return probabilities
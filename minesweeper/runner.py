@@ -1,6 +1,7 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -39,13 +40,20 @@ mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
 # Create game and AI agent
 game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
 flags = set()
 lost = False
 
+# The AI updates its knowledge on a worker thread so the window keeps
+# redrawing; one worker keeps the updates in the order the moves were made
+FPS = 30
+clock = pygame.time.Clock()
+executor = ThreadPoolExecutor(max_workers=1)
+pending = []
+
 # Show instructions initially
 instructions = True
 
@@ -54,8 +62,14 @@ while True:
     # Check if game quit
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
+    # Collect finished knowledge updates, surfacing any errors
+    for future in [f for f in pending if f.done()]:
+        pending.remove(future)
+        future.result()
+
     screen.fill(BLACK)
 
     # Show game instructions
@@ -153,7 +167,10 @@ while True:
     screen.blit(buttonText, buttonRect)
 
     # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
+    if pending:
+        text = f"AI thinking ({len(pending)})"
+    else:
+        text = "Lost" if lost else "Won" if game.mines == flags else ""
     text = mediumFont.render(text, True, WHITE)
     textRect = text.get_rect()
     textRect.center = ((5 / 6) * width, (2 / 3) * height)
@@ -178,8 +195,9 @@ while True:
     elif left == 1:
         mouse = pygame.mouse.get_pos()
 
-        # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
+        # If AI button clicked, make an AI move once its knowledge is
+        # up to date
+        if aiButton.collidepoint(mouse) and not lost and not pending:
             move = ai.make_safe_move()
             if move is None:
                 move = ai.make_random_move()
@@ -192,10 +210,13 @@ while True:
                 print("AI making safe move.")
             time.sleep(0.2)
 
-        # Reset game state
+        # Reset game state, dropping updates meant for the old AI
         elif resetButton.collidepoint(mouse):
+            for future in pending:
+                future.cancel()
+            pending = []
             game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+            ai = MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES)
             revealed = set()
             flags = set()
             lost = False
@@ -215,8 +236,16 @@ while True:
         if game.is_mine(move):
             lost = True
         else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            # Reveal the whole region opened by the move, and tell the AI
+            # about all of it in one update
+            cells_with_counts = game.reveal(move)
+            revealed.update(cell for cell, _ in cells_with_counts)
+
+            # A flag placed by mistake on a revealed cell is removed
+            flags -= revealed
+            pending.append(
+                executor.submit(ai.add_knowledge_batch, cells_with_counts)
+            )
 
     pygame.display.flip()
+    clock.tick(FPS)
@@ -0,0 +1,173 @@
+"""
+Tic Tac Toe engine on bitboards.
+
+A position is two 9-bit integers, one for the cells held by X and one for
+the cells held by O, with cell (i, j) at bit 3 * i + j. Making a move is a
+bit-OR, and wins are found with a lookup table indexed by a player's bits,
+built once from the 8 winning line masks. The search allocates no boards.
+
+`minimax(board)` takes and returns the same values as tictactoe.minimax, so
+runner.py can use either engine.
+"""
+
+import tictactoe as ttt
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# WINNING[bits] is True if `bits` contains a complete line
+WINNING = tuple(
+    any(bits & mask == mask for mask in WIN_MASKS) for bits in range(1 << 9)
+)
+
+# Number of cells set in every 9-bit pattern
+POPCOUNT = tuple(bin(bits).count("1") for bits in range(1 << 9))
+
+# Cells in search order: center, corners, then edges
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# Search instrumentation
+stats = {"nodes": 0}
+
+
+def from_board(board):
+    """
+    Returns (x, o) bitboards for a list-of-lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == ttt.X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == ttt.O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list-of-lists board for (x, o) bitboards.
+    """
+    return [
+        [
+            ttt.X if x >> (3 * i + j) & 1
+            else ttt.O if o >> (3 * i + j) & 1
+            else ttt.EMPTY
+            for j in range(3)
+        ]
+        for i in range(3)
+    ]
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn.
+    """
+    return ttt.O if POPCOUNT[x] > POPCOUNT[o] else ttt.X
+
+
+def actions(x, o):
+    """
+    Returns the list of empty cell indices, in search order.
+    """
+    empty = FULL & ~(x | o)
+    return [cell for cell in MOVE_ORDER if empty >> cell & 1]
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if WINNING[x]:
+        return ttt.X
+    if WINNING[o]:
+        return ttt.O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return WINNING[x] or WINNING[o] or (x | o) == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
+
+
+def negamax(own, other, alpha, beta):
+    """
+    Returns the value of the position for the player to move, who holds
+    `own`, with the opponent holding `other`: 1 win, 0 draw, -1 loss.
+    """
+    stats["nodes"] += 1
+    if WINNING[other]:
+        return -1
+    occupied = own | other
+    if occupied == FULL:
+        return 0
+    best = -2
+    for cell in MOVE_ORDER:
+        bit = 1 << cell
+        if occupied & bit:
+            continue
+        value = -negamax(other, own | bit, -beta, -alpha)
+        if value > best:
+            best = value
+            if value > alpha:
+                alpha = value
+                if alpha >= beta:
+                    break
+    return best
+
+
+def best_move(x, o):
+    """
+    Returns (cell, value) for the player to move, where value is from
+    that player's point of view, or (None, value) if the game is over.
+    """
+    if player(x, o) == ttt.X:
+        own, other = x, o
+    else:
+        own, other = o, x
+    if WINNING[other]:
+        return None, -1
+    if (x | o) == FULL:
+        return None, 0
+
+    best_cell = None
+    alpha = -2
+    for cell in MOVE_ORDER:
+        bit = 1 << cell
+        if (x | o) & bit:
+            continue
+        value = -negamax(other, own | bit, -2, -alpha)
+        if value > alpha:
+            alpha = value
+            best_cell = cell
+    return best_cell, alpha
+
+
+def minimax(board):
+    """
+    Returns the optimal action (i, j) for the current player on the board.
+    """
+    x, o = from_board(board)
+    if terminal(x, o):
+        return None
+    cell, _ = best_move(x, o)
+    return (cell // 3, cell % 3)
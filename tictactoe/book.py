@@ -0,0 +1,103 @@
+"""
+Build the perfect-play book for tictactoe.minimax.
+
+Every position reachable from the empty board is solved by retrograde
+analysis: positions are visited from the fullest boards back to the empty
+one, so every child is already solved when its parent is. The best move and
+value of each position are written to book.bin, one byte per base-3 board
+key, which tictactoe.minimax then reads in constant time.
+
+Usage: python book.py [output]
+"""
+
+import sys
+import zlib
+
+import tictactoe as ttt
+
+# Cells tried first when several moves are equally good
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+
+def reachable():
+    """
+    Returns a dict from board key to board for every reachable position.
+    """
+    start = ttt.initial_state()
+    positions = {ttt.book_key(start): start}
+    frontier = [start]
+    while frontier:
+        next_frontier = []
+        for board in frontier:
+            if ttt.terminal(board):
+                continue
+            for action in ttt.actions(board):
+                child = ttt.result(board, action)
+                key = ttt.book_key(child)
+                if key not in positions:
+                    positions[key] = child
+                    next_frontier.append(child)
+        frontier = next_frontier
+    return positions
+
+
+def solve(positions):
+    """
+    Returns a dict from board key to (value, best cell) for every position,
+    with value 1 if X wins, -1 if O wins and 0 for a draw under perfect
+    play. The best cell is None for finished games.
+    """
+    solved = dict()
+    fullest_first = sorted(
+        positions,
+        key=lambda key: -sum(cell is not None
+                             for row in positions[key] for cell in row)
+    )
+    for key in fullest_first:
+        board = positions[key]
+        if ttt.terminal(board):
+            solved[key] = (ttt.utility(board), None)
+            continue
+        maximizing = ttt.player(board) == ttt.X
+        best = None
+        for cell in MOVE_ORDER:
+            action = (cell // 3, cell % 3)
+            if board[action[0]][action[1]] != ttt.EMPTY:
+                continue
+            value, _ = solved[ttt.book_key(ttt.result(board, action))]
+            if (best is None
+                    or (maximizing and value > best[0])
+                    or (not maximizing and value < best[0])):
+                best = (value, cell)
+        solved[key] = best
+    return solved
+
+
+def build(path=ttt.BOOK_PATH):
+    """
+    Solves every position and writes the book to `path`.
+    Returns the number of positions solved.
+    """
+    solved = solve(reachable())
+    entries = bytearray([ttt.BOOK_NONE]) * ttt.BOOK_SIZE
+    for key, (value, cell) in solved.items():
+        if cell is not None:
+            entries[key] = (value + 1) << 4 | cell
+    header = ttt.BOOK_HEADER.pack(
+        ttt.BOOK_MAGIC, ttt.BOOK_VERSION, ttt.BOOK_SIZE, zlib.crc32(entries)
+    )
+    with open(path, "wb") as f:
+        f.write(header + bytes(entries))
+    return len(solved)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [output]")
+    path = sys.argv[1] if len(sys.argv) == 2 else ttt.BOOK_PATH
+    count = build(path)
+    print(f"Solved {count} positions into {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+m,n,k-game engine: players take turns on an m-by-n board, and the first to
+get k in a row horizontally, vertically or diagonally wins. Tic-tac-toe is
+the 3,3,3-game.
+
+Full minimax is hopeless beyond small boards, so the search here is a
+depth-limited alpha-beta (negamax) with iterative deepening under a
+wall-clock budget, a heuristic evaluation of open lines, and move ordering
+by the previous iteration's best move, killer moves and the history
+heuristic. On larger boards only cells near existing stones are searched.
+
+`Game(m, n, k)` provides the same functions as the tictactoe module
+(initial_state, player, actions, result, winner, terminal, utility and
+minimax), so runner.py can play any m,n,k-game through it.
+"""
+
+import math
+import time
+
+from tictactoe import EMPTY, O, X, SearchCancelled
+
+# Score for a won position, before subtracting the distance to the win
+WIN = 10 ** 9
+
+# How many searched nodes to wait between checks of the clock
+CHECK_EVERY = 64
+
+
+class Timeout(Exception):
+    """
+    Raised inside the search when its time budget runs out.
+    """
+
+
+class Game:
+    """
+    An m,n,k-game with an iterative-deepening alpha-beta player.
+    """
+
+    X = X
+    O = O
+    EMPTY = EMPTY
+
+    def __init__(self, m=3, n=3, k=3, time_limit=1.0, radius=None):
+        if k > max(m, n):
+            raise ValueError("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.time_limit = time_limit
+
+        # Only cells within `radius` of a stone are candidate moves, except
+        # on boards small enough to search every cell
+        if radius is None:
+            radius = 0 if m * n <= 16 else 2 if m * n > 49 else 1
+        self.radius = radius
+
+        # Every run of k cells in a line, as flat indices
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + (k - 1) * di
+                    end_j = j + (k - 1) * dj
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append(tuple(
+                            (i + s * di) * n + (j + s * dj) for s in range(k)
+                        ))
+
+        # For each cell, the windows passing through it
+        self.cell_windows = [[] for _ in range(m * n)]
+        for window in self.windows:
+            for cell in window:
+                self.cell_windows[cell].append(window)
+
+        # For each cell, the cells within `radius`, nearest first
+        self.neighbours = []
+        for cell in range(m * n):
+            i, j = divmod(cell, n)
+            near = [
+                (max(abs(di), abs(dj)), (i + di) * n + (j + dj))
+                for di in range(-radius, radius + 1)
+                for dj in range(-radius, radius + 1)
+                if (di or dj) and 0 <= i + di < m and 0 <= j + dj < n
+            ]
+            self.neighbours.append([c for _, c in sorted(near)])
+
+        # Cells ordered from the center outwards, used to break ties
+        center = ((m - 1) / 2, (n - 1) / 2)
+        self.central = sorted(
+            range(m * n),
+            key=lambda c: (abs(c // n - center[0]) + abs(c % n - center[1]))
+        )
+
+        # Search instrumentation, reset at every call to best_move
+        self.stats = {"nodes": 0, "depth": 0}
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        cells = [cell for row in board for cell in row]
+        return O if cells.count(X) > cells.count(O) else X
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j)
+            for i in range(self.m)
+            for j in range(self.n)
+            if board[i][j] == EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise Exception("Invalid Action")
+        board_copy = [list(row) for row in board]
+        board_copy[i][j] = self.player(board)
+        return board_copy
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = [cell for row in board for cell in row]
+        for window in self.windows:
+            first = cells[window[0]]
+            if first != EMPTY and all(cells[c] == first for c in window):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        if self.winner(board) is not None:
+            return True
+        return all(cell != EMPTY for row in board for cell in row)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(board)
+        return 1 if winner == X else -1 if winner == O else 0
+
+    def minimax(self, board, cancel=None):
+        """
+        Returns the best action found for the current player within the
+        time budget. If the event `cancel` is set during the search, raises
+        SearchCancelled.
+        """
+        if self.terminal(board):
+            return None
+        return self.best_move(board, cancel=cancel)
+
+    def best_move(self, board, time_limit=None, max_depth=None, cancel=None):
+        """
+        Returns the action (i, j) chosen by iterative deepening, searching
+        one ply deeper each round until `time_limit` seconds have passed
+        or `max_depth` is reached. Raises SearchCancelled if the event
+        `cancel` is set first.
+        """
+        if time_limit is None:
+            time_limit = self.time_limit
+        cells = [cell for row in board for cell in row]
+        empties = cells.count(EMPTY)
+        if max_depth is None:
+            max_depth = empties
+        me = self.player(board)
+
+        self.stats = {"nodes": 0, "depth": 0}
+        self.deadline = time.perf_counter() + time_limit
+        self.cancel = cancel
+        self.killers = [[None, None] for _ in range(empties + 1)]
+        self.history = [0] * (self.m * self.n)
+
+        moves = self.candidates(cells)
+        best = moves[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                value, move = self.root(cells, me, depth, best)
+            except Timeout:
+                break
+            best = move
+            self.stats["depth"] = depth
+            if abs(value) >= WIN - self.m * self.n:
+                break
+        return divmod(best, self.n)
+
+    def root(self, cells, me, depth, first):
+        """
+        Searches every root move to `depth`, trying `first` first.
+        Returns (value, move) for the player `me`.
+        """
+        other = O if me == X else X
+        moves = self.order(self.candidates(cells), 0, first)
+        alpha = -math.inf
+        best = moves[0]
+        for move in moves:
+            cells[move] = me
+            try:
+                if self.wins(cells, move, me):
+                    value = WIN - 1
+                else:
+                    value = -self.negamax(
+                        cells, other, depth - 1, 1, -math.inf, -alpha
+                    )
+            finally:
+                cells[move] = EMPTY
+            if value > alpha:
+                alpha = value
+                best = move
+        return alpha, best
+
+    def negamax(self, cells, me, depth, ply, alpha, beta):
+        """
+        Returns the value for `me`, to move, searched `depth` plies deep.
+        """
+        self.stats["nodes"] += 1
+        if self.stats["nodes"] % CHECK_EVERY == 0:
+            if self.cancel is not None and self.cancel.is_set():
+                raise SearchCancelled
+            if time.perf_counter() > self.deadline:
+                raise Timeout
+
+        moves = self.candidates(cells)
+        if not moves:
+            return 0
+        if depth == 0:
+            return self.evaluate(cells, me)
+
+        other = O if me == X else X
+        best = -math.inf
+        for move in self.order(moves, ply, None):
+            cells[move] = me
+            try:
+                if self.wins(cells, move, me):
+                    value = WIN - ply - 1
+                else:
+                    value = -self.negamax(
+                        cells, other, depth - 1, ply + 1, -beta, -alpha
+                    )
+            finally:
+                cells[move] = EMPTY
+            if value > best:
+                best = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        # Remember the refutation for sibling positions
+                        killers = self.killers[ply]
+                        if killers[0] != move:
+                            killers[1] = killers[0]
+                            killers[0] = move
+                        self.history[move] += depth * depth
+                        break
+        return best
+
+    def candidates(self, cells):
+        """
+        Returns the empty cells worth searching, nearest the center first.
+        """
+        if self.radius == 0:
+            return [c for c in self.central if cells[c] == EMPTY]
+        near = set()
+        for cell, value in enumerate(cells):
+            if value != EMPTY:
+                for neighbour in self.neighbours[cell]:
+                    if cells[neighbour] == EMPTY:
+                        near.add(neighbour)
+        if not near:
+            return [c for c in self.central[:1] if cells[c] == EMPTY] or [
+                c for c in self.central if cells[c] == EMPTY
+            ]
+        return [c for c in self.central if c in near]
+
+    def order(self, moves, ply, first):
+        """
+        Orders `moves`: `first`, then killer moves at this ply, then by
+        history score, keeping the central order among ties.
+        """
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history
+
+        def priority(move):
+            if move == first:
+                return (0, 0)
+            if move in killers:
+                return (1, 0)
+            return (2, -history[move])
+
+        return sorted(moves, key=priority)
+
+    def wins(self, cells, move, me):
+        """
+        Returns True if `me` has k in a row through `move`.
+        """
+        for window in self.cell_windows[move]:
+            if all(cells[c] == me for c in window):
+                return True
+        return False
+
+    def evaluate(self, cells, me):
+        """
+        Returns a heuristic value for `me`: every window holding stones of
+        only one player counts 10^stones for that player.
+        """
+        score = 0
+        for window in self.windows:
+            mine = theirs = 0
+            for c in window:
+                value = cells[c]
+                if value == me:
+                    mine += 1
+                elif value != EMPTY:
+                    theirs += 1
+            if mine and not theirs:
+                score += 10 ** mine
+            elif theirs and not mine:
+                score -= 10 ** theirs
+        return score
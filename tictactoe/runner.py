@@ -1,8 +1,18 @@
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
+from mnk import Game
+from tictactoe import SearchCancelled
+
+# Play an m,n,k-game instead of tic-tac-toe when given m n k
+if len(sys.argv) == 4:
+    ttt = Game(*[int(arg) for arg in sys.argv[1:]])
+elif len(sys.argv) != 1:
+    sys.exit("Usage: python runner.py [m n k]")
 
 pygame.init()
 size = width, height = 600, 400
@@ -16,17 +26,45 @@ screen = pygame.display.set_mode(size)
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+smallFont = pygame.font.Font("OpenSans-Regular.ttf", 18)
+
+# The AI searches on a worker thread so the window keeps redrawing
+FPS = 30
+clock = pygame.time.Clock()
+executor = ThreadPoolExecutor(max_workers=1)
+search = None
+cancel = None
+
+
+def stop_search():
+    """
+    Cancels the running AI search, if any, and forgets its result.
+    """
+    global search, cancel
+    if cancel is not None:
+        cancel.set()
+    search = None
+    cancel = None
+
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            stop_search()
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
+        # Escape cancels the computer's search and returns to the menu
+        if (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE
+                and search is not None):
+            stop_search()
+            user = None
+            board = ttt.initial_state()
+
     screen.fill(black)
 
     # Let user choose a player.
@@ -67,13 +105,14 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        rows, cols = len(board), len(board[0])
+        tile_size = min(80, (height - 100) // rows, (width - 40) // cols)
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -83,6 +122,11 @@ while True:
 
                 if board[i][j] != ttt.EMPTY:
                     move = moveFont.render(board[i][j], True, white)
+                    if tile_size < 80:
+                        move = pygame.transform.smoothscale(
+                            move, (move.get_width() * tile_size // 80,
+                                   move.get_height() * tile_size // 80)
+                        )
                     moveRect = move.get_rect()
                     moveRect.center = rect.center
                     screen.blit(move, moveRect)
@@ -108,22 +152,37 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Show search progress while the computer is thinking
+        if search is not None:
+            progress = smallFont.render(
+                f"{ttt.stats['nodes']} positions searched. Esc to cancel.",
+                True, white
+            )
+            progressRect = progress.get_rect()
+            progressRect.center = ((width / 2), height - 20)
+            screen.blit(progress, progressRect)
+
+        # Start the AI search in the background, or collect its move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if search is None:
+                cancel = threading.Event()
+                search = executor.submit(ttt.minimax, board, cancel)
+            elif search.done():
+                try:
+                    move = search.result()
+                except SearchCancelled:
+                    move = None
+                search = None
+                cancel = None
+                if move is not None:
+                    board = ttt.result(board, move)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -139,8 +198,9 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    stop_search()
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
 
     pygame.display.flip()
+    clock.tick(FPS)
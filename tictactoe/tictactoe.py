@@ -4,11 +4,91 @@ Tic Tac Toe Player
 
 import math
 import copy
+import os
+import struct
+import warnings
+import zlib
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Transposition table bound types
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+def _symmetries():
+    """
+    Returns the 8 rotations and reflections of the board, each as a tuple
+    `perm` of cell indices (3 * row + col) such that cell k of the
+    transformed board is cell perm[k] of the original.
+    """
+    cells = [(row, col) for row in range(3) for col in range(3)]
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (c, 2 - r),
+        lambda r, c: (2 - r, 2 - c),
+        lambda r, c: (2 - c, r),
+        lambda r, c: (r, 2 - c),
+        lambda r, c: (2 - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (2 - c, 2 - r),
+    ]
+    symmetries = []
+    for transform in transforms:
+        perm = [0] * 9
+        for row, col in cells:
+            new_row, new_col = transform(row, col)
+            perm[3 * new_row + new_col] = 3 * row + col
+        symmetries.append(tuple(perm))
+    return symmetries
+
+
+SYMMETRIES = _symmetries()
+
+# Cell values as base-3 digits for hashing boards
+DIGITS = {EMPTY: 0, X: 1, O: 2}
+
+# Canonical board key -> (value, bound type, best move in canonical cells).
+# Kept for the life of the process, so later turns reuse earlier searches.
+transposition_table = {}
+
+# Cells in search order: center, corners, then edges
+MOVE_ORDER = (
+    (1, 1),
+    (0, 0), (0, 2), (2, 0), (2, 2),
+    (0, 1), (1, 0), (1, 2), (2, 1),
+)
+
+# Search instrumentation, reset at every call to minimax: positions visited,
+# beta cutoffs, and null-window searches that failed and were repeated
+stats = {"nodes": 0, "cutoffs": 0, "researches": 0}
+
+# Event that stops the running search when set, e.g. from a UI thread
+cancel_event = None
+
+
+class SearchCancelled(Exception):
+    """
+    Raised by minimax when its search is cancelled.
+    """
+
+# Perfect-play table written by book.py: a header of magic, format version,
+# entry count and CRC32 of the entries, then one byte per base-3 board key
+# holding (value + 1) << 4 | best cell, or BOOK_NONE for boards not in it
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+BOOK_MAGIC = b"TTTB"
+BOOK_VERSION = 1
+BOOK_HEADER = struct.Struct("<4sHII")
+BOOK_SIZE = 3 ** 9
+BOOK_NONE = 0xFF
+
+# Loaded table, or None when missing or invalid; not loaded until first use
+book = None
+book_loaded = False
+
 
 def initial_state():
     """
@@ -122,34 +202,254 @@ def utility(board):
     else:
         return 0
 
+def load_book(path=BOOK_PATH):
+    """
+    Returns the entries of the book at `path`, or None if it is missing.
+    A book with the wrong magic, version, size or checksum is reported with
+    a warning and ignored, so that search is used instead.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    problem = None
+    if len(data) < BOOK_HEADER.size:
+        problem = "truncated header"
+    else:
+        magic, version, count, checksum = BOOK_HEADER.unpack_from(data)
+        entries = data[BOOK_HEADER.size:]
+        if magic != BOOK_MAGIC:
+            problem = "not a tic-tac-toe book"
+        elif version != BOOK_VERSION:
+            problem = f"version {version}, expected {BOOK_VERSION}"
+        elif count != BOOK_SIZE or len(entries) != BOOK_SIZE:
+            problem = "wrong number of entries"
+        elif zlib.crc32(entries) != checksum:
+            problem = "checksum mismatch"
+    if problem is not None:
+        warnings.warn(f"ignoring book {path}: {problem}; run book.py to rebuild")
+        return None
+    return entries
+
+
+def book_key(board):
+    """
+    Returns the base-3 key of the board, reading cells row by row.
+    """
+    key = 0
+    for row in board:
+        for cell in row:
+            key = key * 3 + DIGITS[cell]
+    return key
+
+
+def book_move(board):
+    """
+    Returns the book's best action for the board, or None if the book is
+    unavailable or has no entry for it.
+    """
+    global book, book_loaded
+    if not book_loaded:
+        book = load_book()
+        book_loaded = True
+    if book is None:
+        return None
+    entry = book[book_key(board)]
+    if entry == BOOK_NONE:
+        return None
+    cell = entry & 0x0F
+    return (cell // 3, cell % 3)
+
+
+def canonical(board):
+    """
+    Returns (key, perm): the smallest base-3 hash of the board over all 8
+    symmetries, and the symmetry that produces it.
+    """
+    cells = [DIGITS[cell] for row in board for cell in row]
+    best_key = None
+    best_perm = None
+    for perm in SYMMETRIES:
+        key = 0
+        for index in perm:
+            key = key * 3 + cells[index]
+        if best_key is None or key < best_key:
+            best_key = key
+            best_perm = perm
+    return best_key, best_perm
+
+
+def reset_search():
+    """
+    Clears the transposition table and the search statistics.
+    """
+    transposition_table.clear()
+    reset_stats()
+
+
+def reset_stats():
+    """
+    Zeroes the search statistics.
+    """
+    for name in stats:
+        stats[name] = 0
+
+
+def ordered_actions(board, first=None):
+    """
+    Returns the possible actions in search order, with `first` (the best
+    move from an earlier search, if any) ahead of the rest.
+    """
+    moves = [(i, j) for i, j in MOVE_ORDER if board[i][j] == EMPTY]
+    if first is not None and first in moves:
+        moves.remove(first)
+        moves.insert(0, first)
+    return moves
+
+
+def probe(board, alpha, beta):
+    """
+    Looks the board up in the transposition table.
+    Returns (key, perm, value, alpha, beta, move), where value is not None
+    if the stored entry settles the position for this window, and move is
+    the stored best action on the board, if any.
+    """
+    key, perm = canonical(board)
+    entry = transposition_table.get(key)
+    if entry is None:
+        return key, perm, None, alpha, beta, None
+    value, bound, move = entry
+    if move is not None:
+        move = divmod(perm[move], 3)
+    if bound == EXACT:
+        return key, perm, value, alpha, beta, move
+    if bound == LOWER:
+        alpha = max(alpha, value)
+    else:
+        beta = min(beta, value)
+    if beta <= alpha:
+        return key, perm, value, alpha, beta, move
+    return key, perm, None, alpha, beta, move
+
+
+def store(key, perm, value, alpha, beta, action):
+    """
+    Stores a searched value with its bound type for the window (alpha, beta),
+    and the best action translated to canonical cells.
+    """
+    if value <= alpha:
+        bound = UPPER
+    elif value >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    move = None
+    if action is not None:
+        move = perm.index(3 * action[0] + action[1])
+    transposition_table[key] = (value, bound, move)
+
+
 def max_value(board, alpha, beta):
-    v = -math.inf
+    stats["nodes"] += 1
+    if cancel_event is not None and cancel_event.is_set():
+        raise SearchCancelled
     if terminal(board):
         return utility(board)
-    for action in actions(board):
-        v = max(v, min_value(result(board,action), alpha, beta))
+    key, perm, stored, alpha, beta, first = probe(board, alpha, beta)
+    if stored is not None:
+        return stored
+    original_alpha = alpha
+    v = -math.inf
+    best = None
+    for action in ordered_actions(board, first):
+        child = result(board, action)
+        if best is None or alpha == -math.inf:
+            value = min_value(child, alpha, beta)
+        else:
+            # Prove the move is no better than the best so far with a null
+            # window, and only search it fully if that fails
+            value = min_value(child, alpha, alpha + 1)
+            if alpha < value < beta:
+                stats["researches"] += 1
+                value = min_value(child, alpha, beta)
+        if value > v:
+            v = value
+            best = action
         alpha = max(alpha, v)
         if beta <= alpha:
+            stats["cutoffs"] += 1
             break
+    store(key, perm, v, original_alpha, beta, best)
     return v
 
 def min_value(board, alpha, beta):
-    v = math.inf
+    stats["nodes"] += 1
+    if cancel_event is not None and cancel_event.is_set():
+        raise SearchCancelled
     if terminal(board):
         return utility(board)
-    for action in actions(board):
-        v = min(v, max_value(result(board,action), alpha, beta))
+    key, perm, stored, alpha, beta, first = probe(board, alpha, beta)
+    if stored is not None:
+        return stored
+    original_beta = beta
+    v = math.inf
+    best = None
+    for action in ordered_actions(board, first):
+        child = result(board, action)
+        if best is None or beta == math.inf:
+            value = max_value(child, alpha, beta)
+        else:
+            value = max_value(child, beta - 1, beta)
+            if alpha < value < beta:
+                stats["researches"] += 1
+                value = max_value(child, alpha, beta)
+        if value < v:
+            v = value
+            best = action
         beta = min(beta, v)
         if beta <= alpha:
+            stats["cutoffs"] += 1
             break
+    store(key, perm, v, alpha, original_beta, best)
     return v
 
-def minimax(board):
+def minimax(board, cancel=None):
+    """
+    Returns the optimal action for the current player on the board.
+    If the event `cancel` is set during the search, raises SearchCancelled.
+    """
+    global cancel_event
+    cancel_event = cancel
+    reset_stats()
+    try:
+        return search(board)
+    finally:
+        cancel_event = None
+
+
+def search(board):
     """
     Returns the optimal action for the current player on the board.
     """
     if terminal(board):
         return None
+
+    # Answer from the precomputed book when there is one
+    action = book_move(board)
+    if action is not None:
+        return action
+
+    # Answer from the transposition table when the position is solved
+    key, perm = canonical(board)
+    entry = transposition_table.get(key)
+    first = None
+    if entry is not None and entry[2] is not None:
+        index = perm[entry[2]]
+        first = (index // 3, index % 3)
+        if entry[1] == EXACT:
+            return first
     
     current_player = player(board)
     best_action = None
@@ -159,8 +459,15 @@ def minimax(board):
         best_value = -math.inf
         alpha = -math.inf
         beta = math.inf
-        for action in actions(board):
-            value = min_value(result(board, action), alpha ,beta)
+        for action in ordered_actions(board, first):
+            child = result(board, action)
+            if best_action is None:
+                value = min_value(child, alpha, beta)
+            else:
+                value = min_value(child, alpha, alpha + 1)
+                if value > alpha:
+                    stats["researches"] += 1
+                    value = min_value(child, alpha, beta)
             if value > best_value:
                 best_value = value
                 best_action = action
@@ -179,8 +486,15 @@ def minimax(board):
         best_value = math.inf
         alpha = -math.inf
         beta = math.inf
-        for action in actions(board):
-            value = max_value(result(board, action), alpha, beta)
+        for action in ordered_actions(board, first):
+            child = result(board, action)
+            if best_action is None:
+                value = max_value(child, alpha, beta)
+            else:
+                value = max_value(child, beta - 1, beta)
+                if value < beta:
+                    stats["researches"] += 1
+                    value = max_value(child, alpha, beta)
             if value < best_value:
                 best_value = value
                 best_action = action
@@ -190,6 +504,6 @@ def minimax(board):
         #for action in actions(board):
         #    plays.append([max_value(result(board, action)), action])
         #return sorted(plays, key=lambda X: X[0])[0][1]
-        
-        
+
+    store(key, perm, best_value, -math.inf, math.inf, best_action)
     return best_action
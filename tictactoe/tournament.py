@@ -0,0 +1,255 @@
+"""
+Headless tic-tac-toe tournament between engines.
+
+Plays many games between pairs of engines across a process pool, recording
+every move's latency and searched node count along with each game's outcome,
+and aggregates them into a report. Use it as a throughput and regression
+benchmark for changes to tictactoe.py: a perfect engine must never finish
+worse than the value of the position it took over from the random opening
+moves, and the run exits with an error if one does.
+
+Engines:
+    minimax    tictactoe.minimax (uses book.bin when it has been built)
+    search     tictactoe.minimax with the book disabled
+    bitboard   bitboard.minimax
+    mnk        mnk.Game(3, 3, 3).minimax
+    random     a uniformly random legal move
+
+Usage: python tournament.py --match minimax:random --match random:bitboard
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+
+import bitboard
+import tictactoe as ttt
+from mnk import Game
+
+ENGINES = ["minimax", "search", "bitboard", "mnk", "random"]
+
+# Engines expected to play perfectly
+PERFECT = {"minimax", "search", "bitboard", "mnk"}
+
+# Outcome of a game from X's point of view, by winner
+SCORES = {ttt.X: 1, ttt.O: -1, None: 0}
+
+# Per-process engine state: the mnk player and the book, loaded once
+mnk_game = None
+opening_book = None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play tic-tac-toe engines against each other."
+    )
+    parser.add_argument("--match", action="append", metavar="X:O",
+                        help="engines playing X and O (repeatable); "
+                             "default: every perfect engine against random "
+                             "on both sides, and minimax against bitboard")
+    parser.add_argument("-n", "--games", type=int, default=1000,
+                        help="games per match")
+    parser.add_argument("--openings", type=int, default=2,
+                        help="random opening plies, so engine-vs-engine "
+                             "games differ")
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the transposition table before every "
+                             "game instead of keeping it across games")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    matches = args.match or [
+        f"{engine}:random" for engine in sorted(PERFECT)
+    ] + [
+        f"random:{engine}" for engine in sorted(PERFECT)
+    ] + ["minimax:bitboard"]
+    pairs = []
+    for match in matches:
+        engines = match.split(":")
+        if len(engines) != 2 or not all(e in ENGINES for e in engines):
+            parser.error(f"bad match {match}, engines are {ENGINES}")
+        pairs.append(tuple(engines))
+
+    jobs = [
+        (x, o, args.seed * 1000003 + i * 7919 + g, args.openings, args.cold)
+        for i, (x, o) in enumerate(pairs)
+        for g in range(args.games)
+    ]
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        games = list(pool.imap_unordered(play_game, jobs, chunksize=32))
+    elapsed = time.perf_counter() - start
+
+    report = summarize(games, pairs, elapsed)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if report["perfect_losses"]:
+        sys.exit(f"{report['perfect_losses']} games misplayed by a "
+                 "perfect engine")
+
+
+def choose(engine, board, rng):
+    """
+    Returns (action, nodes searched) for `engine` on the board.
+    """
+    global mnk_game, opening_book
+    if engine == "random":
+        return rng.choice(sorted(ttt.actions(board))), 0
+    if engine in ("minimax", "search"):
+        if opening_book is None:
+            opening_book = ttt.load_book() or ()
+        ttt.book = opening_book if engine == "minimax" and opening_book else None
+        ttt.book_loaded = True
+        action = ttt.minimax(board)
+        return action, ttt.stats["nodes"]
+    if engine == "bitboard":
+        before = bitboard.stats["nodes"]
+        action = bitboard.minimax(board)
+        return action, bitboard.stats["nodes"] - before
+    if mnk_game is None:
+        mnk_game = Game(3, 3, 3, time_limit=10)
+    action = mnk_game.minimax(board)
+    return action, mnk_game.stats["nodes"]
+
+
+def play_game(job):
+    """
+    Plays one game and returns its record: the engines, the winner, the
+    game-theoretic value once the random openings were over, and each
+    move's engine, latency and nodes.
+    """
+    x, o, seed, openings, cold = job
+    rng = random.Random(seed)
+    if cold:
+        ttt.reset_search()
+    board = ttt.initial_state()
+    moves = []
+    value = None
+    while not ttt.terminal(board):
+        if len(moves) < openings:
+            engine = "random"
+        else:
+            if value is None:
+                value = perfect_value(board)
+            engine = x if ttt.player(board) == ttt.X else o
+        turn = ttt.player(board)
+        start = time.perf_counter()
+        action, nodes = choose(engine, board, rng)
+        latency = time.perf_counter() - start
+        board = ttt.result(board, action)
+        moves.append({
+            "engine": engine,
+            "player": turn,
+            "seconds": latency,
+            "nodes": nodes,
+        })
+    if value is None:
+        value = ttt.utility(board)
+    return {
+        "x": x,
+        "o": o,
+        "winner": ttt.winner(board),
+        "value": value,
+        "moves": moves,
+    }
+
+
+def perfect_value(board):
+    """
+    Returns the value of the board under perfect play, from X's point of
+    view: 1 if X wins, -1 if O wins, 0 for a draw.
+    """
+    x, o = bitboard.from_board(board)
+    _, value = bitboard.best_move(x, o)
+    return value if bitboard.player(x, o) == ttt.X else -value
+
+
+def summarize(games, pairs, elapsed):
+    """
+    Aggregates game records into per-match outcomes and per-engine move
+    statistics.
+    """
+    matches = []
+
+    # A perfect engine may be handed a lost position by the random
+    # openings, but must never finish below the value it was handed
+    perfect_losses = 0
+    for x, o in pairs:
+        played = [g for g in games if g["x"] == x and g["o"] == o]
+        outcomes = {
+            "x_wins": sum(g["winner"] == ttt.X for g in played),
+            "o_wins": sum(g["winner"] == ttt.O for g in played),
+            "draws": sum(g["winner"] is None for g in played),
+        }
+        for g in played:
+            outcome = SCORES[g["winner"]]
+            if (x in PERFECT and outcome < g["value"]
+                    or o in PERFECT and outcome > g["value"]):
+                perfect_losses += 1
+        matches.append({"x": x, "o": o, "games": len(played), **outcomes})
+
+    engines = {}
+    all_moves = [m for g in games for m in g["moves"]]
+    for engine in sorted({m["engine"] for m in all_moves}):
+        moves = [m for m in all_moves if m["engine"] == engine]
+        latencies = sorted(m["seconds"] for m in moves)
+        engines[engine] = {
+            "moves": len(moves),
+            "mean_seconds": statistics.fmean(latencies),
+            "p50_seconds": percentile(latencies, 0.50),
+            "p95_seconds": percentile(latencies, 0.95),
+            "max_seconds": latencies[-1],
+            "mean_nodes": statistics.fmean(m["nodes"] for m in moves),
+            "max_nodes": max(m["nodes"] for m in moves),
+        }
+
+    return {
+        "games": len(games),
+        "seconds": elapsed,
+        "games_per_second": len(games) / elapsed if elapsed else None,
+        "perfect_losses": perfect_losses,
+        "matches": matches,
+        "engines": engines,
+    }
+
+
+def percentile(values, fraction):
+    """
+    Returns the value at `fraction` of the way through sorted `values`.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def print_report(report):
+    """
+    Prints the tournament report as two tables.
+    """
+    print(f"{report['games']} games in {report['seconds']:.2f}s "
+          f"({report['games_per_second']:.1f} games/s)")
+    print()
+    print(f"{'X':>10} {'O':>10} {'games':>7} {'X wins':>7} "
+          f"{'O wins':>7} {'draws':>7}")
+    for m in report["matches"]:
+        print(f"{m['x']:>10} {m['o']:>10} {m['games']:>7} {m['x_wins']:>7} "
+              f"{m['o_wins']:>7} {m['draws']:>7}")
+    print()
+    print(f"{'engine':>10} {'moves':>8} {'mean ms':>9} {'p95 ms':>9} "
+          f"{'max ms':>9} {'mean nodes':>11}")
+    for engine, s in report["engines"].items():
+        print(f"{engine:>10} {s['moves']:>8} {s['mean_seconds'] * 1000:>9.3f} "
+              f"{s['p95_seconds'] * 1000:>9.3f} {s['max_seconds'] * 1000:>9.3f} "
+              f"{s['mean_nodes']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()